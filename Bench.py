@@ -0,0 +1,962 @@
+import os
+import sys
+import json
+import time
+import platform
+import resource
+import random
+import logging
+import argparse
+import tempfile
+import tracemalloc
+import subprocess
+from array import array
+import contextlib
+import WBS
+from wbsplan import Sinks,RenderCache
+
+#----------------------------------------------------
+def writePlan(fileName,size,branching=10) :
+  # Balanced plan of size tasks written in document (pre) order :
+  # task k has children k*branching+1 .. k*branching+branching
+  with open(fileName,"w") as f :
+    stack=[(0,1)]
+    while stack :
+      k,depth=stack.pop()
+      f.write("{:s},T{:d},Task {:d},2023-01-{:02d},2023-12-{:02d},who{:d},{:d}\n".format(
+        "*" * depth,
+        k,
+        k,
+        1 + k % 28,
+        1 + k % 28,
+        k % 50,
+        k % 101,
+      ))
+      first=k * branching + 1
+      for c in range(min(first + branching,size) - 1,first - 1,-1) :
+        stack.append((c,depth + 1))
+
+#----------------------------------------------------
+def timeLoad(fileName) :
+  tree=WBS.Tree()
+  t0=time.perf_counter()
+  WBS.build(fileName,tree)
+  return(time.perf_counter() - t0)
+
+#----------------------------------------------------
+def fLoad(args) :
+  print("{:>10s} {:>10s} {:>12s}".format("rows","seconds","us/row"))
+  with tempfile.TemporaryDirectory() as tmp :
+    base=None
+    for size in args.sizes :
+      fileName=os.path.join(tmp,"plan{:d}.csv".format(size))
+      writePlan(fileName,size,args.branching)
+      elapsed=timeLoad(fileName)
+      perRow=elapsed * 1e6 / size
+      base=perRow if base is None else base
+      print("{:10d} {:10.3f} {:12.2f} x{:.2f}".format(size,elapsed,perRow,perRow / base))
+      os.remove(fileName)
+
+#----------------------------------------------------
+def fMemory(args) :
+  print("{:>10s} {:>12s}".format("rows","bytes/task"))
+  with tempfile.TemporaryDirectory() as tmp :
+    for size in args.sizes :
+      fileName=os.path.join(tmp,"plan{:d}.csv".format(size))
+      writePlan(fileName,size,args.branching)
+      tracemalloc.start()
+      tree=WBS.Tree()
+      WBS.build(fileName,tree)
+      current,peak=tracemalloc.get_traced_memory()
+      tracemalloc.stop()
+      print("{:10d} {:12.1f}".format(size,current / size))
+      del tree
+      os.remove(fileName)
+
+#----------------------------------------------------
+def shapedTree(size,deep) :
+  # deep : a chain, each task under the previous one
+  # wide : a fan-out, every task under the root
+  tree=WBS.Tree()
+  start=WBS.parseDate('2023-01-02')
+  end=WBS.parseDate('2023-01-20')
+  parent=WBS.NONE
+  for k in range(size) :
+    level=0 if parent == WBS.NONE else tree.level[parent] + 1
+    i=tree.addNode(parent,level,'T','Task','who',start,end,10)
+    if deep or parent == WBS.NONE :
+      parent=i
+  return(tree)
+
+#----------------------------------------------------
+def timePasses(tree) :
+  args=argparse.Namespace(fix=True,dump=False)
+  passes=[
+    ("percolate+fix",lambda : WBS.Percolator(args,tree)),
+    ("adjustLevel",lambda : tree.adjustLevel(tree.getNode(1))),
+    ("display",lambda : tree.display(tree.getRoot())),
+    ("walks",lambda : checkWalks(tree)),
+    ("wbs",lambda : WBS.WbsGenerator(args,tree).treeToWbs()),
+    ("gantt",lambda : WBS.GanttGenerator(args,tree).treeToGantt()),
+    ("wbs+gantt",lambda : sharedGeneration(args,tree,Sinks.StdoutSink(),Sinks.StdoutSink())),
+  ]
+  with open(os.devnull,"w") as devnull :
+    for name,run in passes :
+      t0=time.perf_counter()
+      with contextlib.redirect_stdout(devnull) :
+        run()
+      print("{:>15s} {:10.3f}".format(name,time.perf_counter() - t0))
+
+#----------------------------------------------------
+def checkWalks(tree) :
+  # pre-order and post-order are the DOWN and UP events of walk
+  events=list(WBS.walk(tree,0))
+  if list(WBS.preOrder(tree,0)) != [i for event,i in events if event == WBS.DOWN] :
+    raise SystemExit("preOrder differs from walk")
+  if list(WBS.postOrder(tree,0)) != [i for event,i in events if event == WBS.UP] :
+    raise SystemExit("postOrder differs from walk")
+
+#----------------------------------------------------
+def sharedGeneration(args,tree,wbsSink,ganttSink,jobs=1) :
+  generation=WBS.Generation(tree,None,jobs)
+  generation.add(WBS.WbsGenerator(args,tree),wbsSink)
+  generation.add(WBS.GanttGenerator(args,tree),ganttSink)
+  generation.run()
+
+#----------------------------------------------------
+def fShape(args) :
+  for shape,deep in (("deep",True),("wide",False)) :
+    size=args.deep if deep else args.wide
+    print("{:s} : {:d} tasks".format(shape,size))
+    timePasses(shapedTree(size,deep))
+
+#----------------------------------------------------
+def writeRandomPlan(fileName,size,seed,span=300) :
+  # Irregular plan : random depths, about a third of the dates and
+  # statuses missing, every status class represented, starts spread over
+  # span days
+  rng=random.Random(seed)
+  statuses=['','','-1','0','10','50','99','100']
+  with open(fileName,"w") as f :
+    depth=1
+    for k in range(size) :
+      depth=1 if k == 0 else rng.randint(2,depth + 1)
+      start=rng.randint(1,span)
+      end=start + rng.randint(0,60)
+      f.write("{:s},T{:d},Task {:d},{:s},{:s},who{:d},{:s}\n".format(
+        "*" * depth,
+        k,
+        k,
+        "" if rng.random() < 0.3 else WBS.dateToStr(738521 + start),
+        "" if rng.random() < 0.3 else WBS.dateToStr(738521 + end),
+        rng.randint(0,9),
+        rng.choice(statuses),
+      ))
+
+#----------------------------------------------------
+def sameColumns(a,b) :
+  # texts are compared as strings, string tables may be in different orders
+  for column in WBS.Tree.links + WBS.Tree.values :
+    if getattr(a,column) != getattr(b,column) :
+      return(column)
+  for column in WBS.Tree.texts :
+    if [a.strings.get(j) for j in getattr(a,column)] != [b.strings.get(j) for j in getattr(b,column)] :
+      return(column)
+  if a.includes != b.includes :
+    return('includes')
+  return(None)
+
+#----------------------------------------------------
+def fEquiv(args) :
+  # The fused percolate+fix walk must leave every column exactly as
+  # percolate followed by fix does
+  failures=0
+  with tempfile.TemporaryDirectory() as tmp :
+    fileName=os.path.join(tmp,"plan.csv")
+    for seed in range(args.seeds) :
+      writeRandomPlan(fileName,args.size,seed)
+      multi=WBS.Tree()
+      WBS.build(fileName,multi)
+      t0=time.perf_counter()
+      percolator=WBS.Percolator(argparse.Namespace(fix=False,dump=False),multi)
+      percolator.fix(multi.getRoot())
+      t1=time.perf_counter()
+      fused=WBS.Tree()
+      WBS.build(fileName,fused)
+      t2=time.perf_counter()
+      WBS.Percolator(argparse.Namespace(fix=True,dump=False),fused)
+      t3=time.perf_counter()
+      column=sameColumns(multi,fused)
+      failures += 1 if column else 0
+      print("seed {:3d} multi-pass {:8.3f} fused {:8.3f} {:s}".format(
+        seed,
+        t1 - t0,
+        t3 - t2,
+        "DIFFERS on " + column if column else "identical",
+      ))
+  if failures :
+    sys.exit(1)
+
+#----------------------------------------------------
+def repercolate(tree,fix) :
+  # full percolation of a tree from its given values
+  for column in ('start','end','status') :
+    given=getattr(tree,"given" + column.capitalize())
+    for c in (column,"up" + column.capitalize(),"down" + column.capitalize()) :
+      setattr(tree,c,array('i',given))
+  return(WBS.Percolator(argparse.Namespace(fix=fix,dump=False),tree))
+
+#----------------------------------------------------
+def fUpdate(args) :
+  # Incremental updates of single tasks, checked against a full
+  # percolation of the same given values
+  rng=random.Random(args.seed)
+  with tempfile.TemporaryDirectory() as tmp :
+    fileName=os.path.join(tmp,"plan.csv")
+    writeRandomPlan(fileName,args.size,args.seed)
+    tree=WBS.Tree()
+    WBS.build(fileName,tree)
+    t0=time.perf_counter()
+    percolator=repercolate(tree,args.fix)
+    full=time.perf_counter() - t0
+    check=WBS.Tree()
+    WBS.build(fileName,check)
+  elapsed=0
+  changed=0
+  for k in range(args.updates) :
+    node=tree.getNode(rng.randrange(tree.getSize()))
+    field=rng.choice(('start','end','status'))
+    value=rng.choice((-1,0,0,20,50,100)) if field == 'status' else rng.choice((0,738521 + rng.randint(1,360)))
+    t0=time.perf_counter()
+    changed += len(percolator.update(node,**{field : value}))
+    elapsed += time.perf_counter() - t0
+    getattr(check,"given" + field.capitalize())[node.getIndex()]=value
+  repercolate(check,args.fix)
+  column=sameColumns(tree,check)
+  print("{:d} tasks, full percolation {:.3f}s".format(tree.getSize(),full))
+  print("{:d} updates, {:.6f}s each, {:.1f} outputs changed each, {:s}".format(
+    args.updates,
+    elapsed / args.updates,
+    changed / args.updates,
+    "DIFFERS on " + column if column else "identical to a full percolation",
+  ))
+  if column :
+    sys.exit(1)
+
+#----------------------------------------------------
+def writeIncludingPlan(directory,files,size) :
+  # Master plan including files distinct random sub-plans, every other one
+  # through an intermediate file
+  master=os.path.join(directory,"master.csv")
+  with open(master,"w") as f :
+    f.write("*,M,Master,,,,\n")
+    for k in range(files) :
+      writeRandomPlan(os.path.join(directory,"sub{:d}.csv".format(k)),size,k)
+      if k % 2 :
+        with open(os.path.join(directory,"mid{:d}.csv".format(k)),"w") as mid :
+          mid.write("*,I{:d},Intermediate {:d},,,,\n".format(k,k))
+          mid.write("**,!sub{:d}.csv,,,,,\n".format(k))
+          mid.write("**,J{:d},After {:d},,,,\n".format(k,k))
+        f.write("**,!mid{:d}.csv,,,,,\n".format(k))
+      else :
+        f.write("**,!sub{:d}.csv,,,,,\n".format(k))
+  return(master)
+
+#----------------------------------------------------
+def fIncludes(args) :
+  # Parallel loading of the included files must build the same tree as
+  # the sequential one
+  with tempfile.TemporaryDirectory() as tmp :
+    master=writeIncludingPlan(tmp,args.files,args.size)
+    sequential=WBS.Tree()
+    t0=time.perf_counter()
+    WBS.build(master,sequential)
+    t1=time.perf_counter()
+    parallel=WBS.Tree()
+    WBS.buildParallel(master,parallel,args.jobs)
+    t2=time.perf_counter()
+  column=sameColumns(sequential,parallel)
+  print("{:d} tasks, sequential {:.3f}s, {:d} jobs {:.3f}s, {:s}".format(
+    sequential.getSize(),
+    t1 - t0,
+    args.jobs,
+    t2 - t1,
+    "DIFFERS on " + column if column else "identical",
+  ))
+  if column :
+    sys.exit(1)
+
+#----------------------------------------------------
+def fOutput(args) :
+  # Generation streams into the sink : its peak memory must not grow
+  # with the plan. Peak memory is the main process one.
+  print("{:>10s} {:>10s} {:>12s} {:>12s}".format("tasks","seconds","peak bytes","output bytes"))
+  for size in args.sizes :
+    tree=shapedTree(size,False)
+    tracemalloc.start()
+    t0=time.perf_counter()
+    with Sinks.FileSink(os.devnull) as wbsSink, Sinks.FileSink(os.devnull) as ganttSink :
+      sharedGeneration(args,tree,wbsSink,ganttSink,args.jobs)
+    elapsed=time.perf_counter() - t0
+    current,peak=tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print("{:10d} {:10.3f} {:12d} {:12d}".format(size,elapsed,peak,wbsSink.getWritten() + ganttSink.getWritten()))
+
+#----------------------------------------------------
+def timeRender(tree,cache) :
+  wbsSink=Sinks.MemorySink()
+  ganttSink=Sinks.MemorySink()
+  t0=time.perf_counter()
+  generation=WBS.Generation(tree,cache)
+  generation.add(WBS.WbsGenerator(None,tree),wbsSink)
+  generation.add(WBS.GanttGenerator(None,tree),ganttSink)
+  generation.run()
+  return(time.perf_counter() - t0,wbsSink.getValue() + ganttSink.getValue())
+
+#----------------------------------------------------
+def fRender(args) :
+  # Rendering through the cache, cold, warm and after changing one task,
+  # must give the output of an uncached rendering
+  rng=random.Random(args.seed)
+  failures=0
+  with tempfile.TemporaryDirectory() as tmp :
+    fileName=os.path.join(tmp,"plan.csv")
+    writeRandomPlan(fileName,args.size,args.seed)
+    tree=WBS.Tree()
+    WBS.build(fileName,tree)
+    percolator=WBS.Percolator(argparse.Namespace(fix=True,dump=False),tree)
+    cache=RenderCache.RenderCache(os.path.join(tmp,"cache"))
+    for run in ("cold","warm","changed") :
+      if run == "changed" :
+        percolator.update(tree.getNode(rng.randrange(tree.getSize())),status=100)
+      hits,misses=cache.hits,cache.misses
+      cached,text=timeRender(tree,cache)
+      uncached,expected=timeRender(tree,None)
+      failures += text != expected
+      print("{:>8s} uncached {:8.3f} cached {:8.3f} {:6d} hits {:6d} misses {:s}".format(
+        run,
+        uncached,
+        cached,
+        cache.hits - hits,
+        cache.misses - misses,
+        "identical" if text == expected else "DIFFERS",
+      ))
+  if failures :
+    sys.exit(1)
+
+#----------------------------------------------------
+def importTime(module) :
+  # import time of module in a fresh interpreter, the best of a few runs
+  code="import time;t=time.perf_counter();import {:s};print(time.perf_counter()-t)".format(module)
+  here=os.path.dirname(os.path.abspath(__file__))
+  runs=[float(subprocess.check_output([sys.executable,"-c",code],cwd=here)) for k in range(5)]
+  return(min(runs))
+
+#----------------------------------------------------
+def fImports(args) :
+  # The package must import within its budget, the plan module (first
+  # load_plan) within its own : services import it in-process
+  failures=0
+  for module,budget in (("wbsplan",args.package),("wbsplan.Plan",args.plan)) :
+    elapsed=importTime(module) * 1000
+    failures += elapsed > budget
+    print("{:>15s} {:8.2f} ms budget {:6.1f} ms {:s}".format(module,elapsed,budget,"OVER" if elapsed > budget else "ok"))
+  if failures :
+    sys.exit(1)
+
+#----------------------------------------------------
+def fServe(args) :
+  # A render server on a Unix socket, asked for each resource and sent
+  # malformed requests : every request gets its status and a body of the
+  # length announced
+  import asyncio
+  from wbsplan.Server import ResidentPlan,RenderServer
+  with tempfile.TemporaryDirectory() as tmp :
+    fileName=os.path.join(tmp,"plan.csv")
+    writeRandomPlan(fileName,args.size,args.seed)
+    socket=os.path.join(tmp,"wbs.sock")
+    server=RenderServer({'plan' : ResidentPlan('plan',fileName,True)})
+    server.loadAll()
+    rootId=server.plans['plan'].tree.getNode(0).getRow().getId()
+    requests=[
+      (b"GET /plans HTTP/1.0\r\n\r\n",200),
+      (b"GET /plans/plan/wbs HTTP/1.0\r\n\r\n",200),
+      ("GET /plans/plan/gantt?root={:s} HTTP/1.0\r\n\r\n".format(rootId).encode(),200),
+      (b"HEAD /plans HTTP/1.0\r\n\r\n",200),
+      (b"GET /plans/plan/pdf HTTP/1.0\r\n\r\n",404),
+      (b"GET /plans/plan/wbs?root=NOPE HTTP/1.0\r\n\r\n",404),
+      (b"POST /plans HTTP/1.0\r\n\r\n",405),
+      (b"GARBAGE\r\n\r\n",400),
+      (b"\r\n",400),
+      (b"GET /plans",400),
+      (b"",400),
+    ]
+    async def ask(request) :
+      reader,writer=await asyncio.open_unix_connection(socket)
+      writer.write(request)
+      writer.write_eof()
+      response=await reader.read()
+      writer.close()
+      return(response)
+    async def check() :
+      serving=asyncio.get_running_loop().create_task(server.serve(socket=socket))
+      while not os.path.exists(socket) :
+        await asyncio.sleep(0.01)
+      failures=0
+      for request,expected in requests :
+        head,sep,body=(await ask(request)).partition(b"\r\n\r\n")
+        lines=head.decode("latin-1").split("\r\n")
+        status=int(lines[0].split()[1]) if lines[0] else 0
+        length=int(next((l.split(":")[1] for l in lines if l.startswith("Content-Length")),-1))
+        ok=status == expected and (len(body) == length or request.startswith(b"HEAD"))
+        failures += not ok
+        print("{:40s} {:3d} {:6d} bytes {:s}".format(repr(request[:38])[2:-1],status,len(body),"ok" if ok else "FAILED"))
+      serving.cancel()
+      return(failures)
+    if asyncio.run(check()) :
+      sys.exit(1)
+
+#----------------------------------------------------
+def fQuery(args) :
+  # Index lookups checked against full scans, before and after updates
+  rng=random.Random(args.seed)
+  with tempfile.TemporaryDirectory() as tmp :
+    fileName=os.path.join(tmp,"plan.csv")
+    writeRandomPlan(fileName,args.size,args.seed)
+    tree=WBS.Tree()
+    WBS.build(fileName,tree)
+  percolator=WBS.Percolator(argparse.Namespace(fix=True,dump=False),tree)
+  t0=time.perf_counter()
+  index=tree.getTaskIndex()
+  built=time.perf_counter() - t0
+  n=tree.getSize()
+  failures=0
+  scans=0
+  lookups=0
+  for k in range(args.queries) :
+    if k % 10 == 0 :
+      percolator.update(tree.getNode(rng.randrange(n)),status=rng.choice((-1,0,50,100)))
+    who="who{:d}".format(rng.randint(0,9))
+    status=rng.choice(WBS.STATUS_CLASSES)
+    j=rng.randrange(n)
+    t0=time.perf_counter()
+    found=list(index.inSubtree(index.getOwned(who),j))
+    found=[i for i in found if WBS.statusToStr(tree.status[i]) == status]
+    t1=time.perf_counter()
+    subtree=set(WBS.preOrder(tree,j))
+    expected=[i for i in range(n) if i in subtree and tree.strings.get(tree.who[i]) == who and WBS.statusToStr(tree.status[i]) == status]
+    t2=time.perf_counter()
+    failures += found != expected or list(index.getStatus(status)) != [i for i in range(n) if WBS.statusToStr(tree.status[i]) == status]
+    lookups += t1 - t0
+    scans += t2 - t1
+  print("{:d} tasks, index built in {:.3f}s, {:d} queries : index {:.6f}s each, full scan {:.6f}s each, {:s}".format(
+    n,
+    built,
+    args.queries,
+    lookups / args.queries,
+    scans / args.queries,
+    "{:d} DIFFER".format(failures) if failures else "identical",
+  ))
+  if failures :
+    sys.exit(1)
+
+#----------------------------------------------------
+def writeDependentPlan(fileName,size,dependencies,seed) :
+  # Random plan whose tasks depend, with the given probability each, on
+  # earlier tasks, their ancestors included : finish to start or start to
+  # start, with lags. Some tasks also depend on one of their subtasks,
+  # start to start without lag. Depending on earlier tasks or on subtasks
+  # only keeps it acyclic.
+  rng=random.Random(seed)
+  rows=[]
+  ancestors=[]
+  for k in range(size) :
+    depth=1 if k == 0 else rng.randint(2,len(ancestors) + 1)
+    del ancestors[depth - 1:]
+    after=[]
+    while k > depth and rng.random() < dependencies and len(after) < 4 :
+      j=rng.choice(ancestors) if rng.random() < 0.2 else rng.randrange(k)
+      after.append("T{:d}{:s}{:+d}".format(j,rng.choice((":fs",":ss",":")),rng.randint(-2,5)))
+    if len(ancestors) > 1 and rng.random() < dependencies / 4 :
+      rows[rng.choice(ancestors[1:])][2].append("T{:d}:ss".format(k))
+    ancestors.append(k)
+    rows.append((depth,k,after))
+  with open(fileName,"w") as f :
+    for depth,k,after in rows :
+      start=rng.randint(1,300)
+      f.write("{:s},T{:d},Task {:d},{:s},{:s},who{:d},{:d},{:s}\n".format(
+        "*" * depth,
+        k,
+        k,
+        WBS.dateToStr(738521 + start),
+        WBS.dateToStr(738521 + start + rng.randint(0,60)),
+        rng.randint(0,9),
+        rng.choice((0,10,50,100)),
+        " ".join(after),
+      ))
+
+#----------------------------------------------------
+def relaxSchedule(tree) :
+  # Earliest starts and latest ends by relaxing every bound until none
+  # moves, the reference of the passes : O(V+E) per round
+  from wbsplan.Schedule import INFINITE
+  n=tree.getSize()
+  index=tree.getTaskIndex()
+  start=tree.start
+  end=tree.end
+  parent=tree.parent
+  dependencies=[list(tree.getDependencies(i)) if tree.after[i] else [] for i in range(n)]
+  duration=[end[i] - start[i] if start[i] and end[i] else 0 for i in range(n)]
+  earliestStart=list(start)
+  earliestEnd=[0] * n
+  moved=True
+  while moved :
+    moved=False
+    for i in range(n) :
+      es=earliestStart[i]
+      if parent[i] != WBS.NONE :
+        es=max(es,earliestStart[parent[i]])
+      for j,kind,lag in dependencies[i] :
+        if index.isUnder(j,i) :
+          continue
+        if kind == WBS.FINISH_TO_START :
+          es=max(es,earliestEnd[j] + 1 + lag if earliestEnd[j] else 0)
+        else :
+          es=max(es,earliestStart[j] + lag if earliestStart[j] else 0)
+      ee=(end[i] + es - start[i] if start[i] else max(end[i],es)) if end[i] else 0
+      if (es,ee) != (earliestStart[i],earliestEnd[i]) :
+        earliestStart[i]=es
+        earliestEnd[i]=ee
+        moved=True
+  latestEnd=[INFINITE] * n
+  moved=True
+  while moved :
+    moved=False
+    for i in range(n) :
+      p=parent[i]
+      latestEnd[i]=min(latestEnd[i],(max(end[i],earliestEnd[i]) or INFINITE) if p == WBS.NONE else latestEnd[p])
+    for i in range(n) :
+      for j,kind,lag in dependencies[i] :
+        if index.isUnder(i,j) or latestEnd[i] == INFINITE :
+          continue
+        latestStart=latestEnd[i] - duration[i]
+        le=latestStart - 1 - lag if kind == WBS.FINISH_TO_START else latestStart - lag + duration[j]
+        if le < latestEnd[j] :
+          latestEnd[j]=le
+          moved=True
+  return(earliestStart,latestEnd)
+
+#----------------------------------------------------
+def fSchedule(args) :
+  # Forward and backward passes over plans with dependencies across
+  # branches, on ancestors and on subtasks, checked on the smallest plan
+  # against relaxing every bound
+  from wbsplan.Schedule import Scheduler
+  print("{:>10s} {:>12s} {:>10s} {:>12s}".format("tasks","dependencies","seconds","us/task"))
+  with tempfile.TemporaryDirectory() as tmp :
+    base=None
+    for size in args.sizes :
+      fileName=os.path.join(tmp,"plan{:d}.csv".format(size))
+      writeDependentPlan(fileName,size,args.dependencies,args.seed)
+      tree=WBS.Tree()
+      WBS.build(fileName,tree)
+      WBS.Percolator(argparse.Namespace(fix=True,dump=False),tree)
+      t0=time.perf_counter()
+      scheduler=Scheduler(tree,738521)
+      elapsed=time.perf_counter() - t0
+      perTask=elapsed * 1e6 / size
+      base=perTask if base is None else base
+      print("{:10d} {:12d} {:10.3f} {:12.2f} x{:.2f}".format(size,len(scheduler.before),elapsed,perTask,perTask / base))
+      if size == min(args.sizes) :
+        earliestStart,latestEnd=relaxSchedule(tree)
+        if list(scheduler.earliestStart) != earliestStart or list(scheduler.latestEnd) != latestEnd :
+          print("schedule of {:d} tasks differs from relaxing the bounds".format(size))
+          sys.exit(1)
+      os.remove(fileName)
+
+#----------------------------------------------------
+def fResources(args) :
+  # Load table by day and by week, checked against counting each day of
+  # each task
+  from wbsplan.Load import LoadTable
+  with tempfile.TemporaryDirectory() as tmp :
+    fileName=os.path.join(tmp,"plan.csv")
+    writeRandomPlan(fileName,args.size,args.seed,args.days)
+    tree=WBS.Tree()
+    WBS.build(fileName,tree)
+  WBS.Percolator(argparse.Namespace(fix=True,dump=False),tree)
+  t0=time.perf_counter()
+  table=LoadTable(tree)
+  daily=time.perf_counter() - t0
+  t0=time.perf_counter()
+  weekly=LoadTable(tree,week=True)
+  weeks=time.perf_counter() - t0
+  overloads=len(table.getOverloads(args.capacity))
+  t0=time.perf_counter()
+  expected={}
+  for i in range(tree.getSize()) :
+    who=tree.strings.get(tree.who[i])
+    if tree.firstChild[i] == WBS.NONE and who and tree.start[i] and tree.end[i] >= tree.start[i] and tree.status[i] >= 0 :
+      load=expected.setdefault(who,[0] * table.periods)
+      for d in range(tree.start[i],tree.end[i] + 1) :
+        load[d - table.first] += 1
+  scan=time.perf_counter() - t0
+  failures=sum(list(table.getLoad(who)) != load for who,load in expected.items())
+  print("{:d} tasks, {:d} owners, {:d} days : by day {:.3f}s, by week {:.3f}s, day by day {:.3f}s, {:d} overloads, {:s}".format(
+    tree.getSize(),
+    len(expected),
+    table.periods,
+    daily,
+    weeks,
+    scan,
+    overloads,
+    "{:d} DIFFER".format(failures) if failures else "identical",
+  ))
+  if failures :
+    sys.exit(1)
+
+#----------------------------------------------------
+def writeSyntheticPlan(directory,size,seed,depth=8,branching=5,missing=0.3,includes=0.0,directions=0.2) :
+  # Seeded plan of size tasks written to directory/plan.csv : tasks have
+  # 1 to 2*branching-1 children down to depth levels, missing is the share
+  # of dates left empty, directions the share of tasks marked + or -, and
+  # includes the share of tasks whose subtree goes to a file of its own,
+  # included with !file (nested includes follow). Child dates are within
+  # their parent's. Returns the path of the plan.
+  rng=random.Random(seed)
+  children=[[]]
+  levels=[1]
+  queue=[0]
+  head=0
+  while len(levels) < size :
+    if head == len(queue) :
+      queue=[k for k in range(len(levels)) if levels[k] < depth]
+      head=0
+      if not queue :
+        raise ValueError("{:d} tasks do not fit in {:d} levels".format(size,depth))
+    k=queue[head]
+    head += 1
+    if levels[k] >= depth :
+      continue
+    for c in range(min(rng.randint(1,2 * branching - 1),size - len(levels))) :
+      children[k].append(len(levels))
+      children.append([])
+      levels.append(levels[k] + 1)
+      queue.append(len(levels) - 1)
+  statuses=['','-1','0','0','10','50','99','100','100']
+  files=[("plan.csv",0,738521 + rng.randint(0,365))]
+  while files :
+    fileName,root,rootStart=files.pop()
+    with open(os.path.join(directory,fileName),"w") as f :
+      stack=[(root,rootStart,rootStart + rng.randint(30,3 * 365))]
+      while stack :
+        k,start,end=stack.pop()
+        level=levels[k] - levels[root] + 1
+        if k != root and rng.random() < includes :
+          included="inc{:d}.csv".format(k)
+          f.write("{:s},!{:s},,,,,\n".format("*" * level,included))
+          files.append((included,k,start))
+          continue
+        f.write("{:s}{:s},T{:d},Task {:d},{:s},{:s},who{:d},{:s}\n".format(
+          "*" * level,
+          rng.choice("+-") if rng.random() < directions else "",
+          k,
+          k,
+          "" if rng.random() < missing else WBS.dateToStr(start),
+          "" if rng.random() < missing else WBS.dateToStr(end),
+          rng.randint(0,49),
+          rng.choice(statuses),
+        ))
+        for c in reversed(children[k]) :
+          s=rng.randint(start,end)
+          stack.append((c,s,rng.randint(s,end)))
+  return(os.path.join(directory,"plan.csv"))
+
+#----------------------------------------------------
+def syntheticOptions(args) :
+  return({
+    'depth' : args.depth,
+    'branching' : args.branching,
+    'missing' : args.missing,
+    'includes' : args.includes,
+    'directions' : args.directions,
+  })
+
+#----------------------------------------------------
+def fGenerate(args) :
+  os.makedirs(args.output,exist_ok=True)
+  plan=writeSyntheticPlan(args.output,args.size,args.seed,**syntheticOptions(args))
+  print("{:s} : {:d} tasks in {:d} files".format(plan,args.size,len(os.listdir(args.output))))
+
+#----------------------------------------------------
+def fViews(args) :
+  # Diagrams of views of a synthetic plan, timed against the whole plan and
+  # checked against the tasks each view should show, found by a full scan,
+  # each task being drawn with the status it has in the whole diagram
+  from wbsplan.View import View
+  from wbsplan.Generators import generate
+  with tempfile.TemporaryDirectory() as tmp :
+    plan=writeSyntheticPlan(tmp,args.size,args.seed,**syntheticOptions(args))
+    tree=WBS.loadPlan(plan,fix=True)
+  index=tree.getTaskIndex()
+  owner=index.getOwners()[1]
+  # name, root, max depth, owner, status, done collapse
+  views=[
+    ("all",0,None,None,None,False),
+    ("depth 3",0,3,None,None,False),
+    ("subtree",tree.firstChild[0],2,None,None,False),
+    ("owner",0,None,owner,None,False),
+    ("owner backlog",0,None,owner,"Backlog",False),
+    ("done collapsed",0,None,None,None,True),
+    ("depth 4 owner",0,4,owner,None,True),
+  ]
+  whole=Sinks.MemorySink()
+  generate(tree,[('wbs',whole)])
+  statuses=wbsStatuses(whole.getValue())
+  print("{:15s} {:>8s} {:>10s} {:>10s}".format("view","tasks","seconds","KB"))
+  failures=0
+  for name,root,maxDepth,who,status,collapseDone in views :
+    view=View(tree,maxDepth,who,status,collapseDone)
+    wbs=Sinks.MemorySink()
+    sink=Sinks.MemorySink()
+    t0=time.perf_counter()
+    generate(tree,[('wbs',wbs),('gantt',sink)],root=root,view=view)
+    elapsed=time.perf_counter() - t0
+    # a task is kept when its subtree holds a matching task (counted over
+    # the pre-order), and hidden under a rolled up task
+    end=root + index.size[root]
+    matched=array('i',[0]) * (end + 1)
+    for i in range(root,end) :
+      match=(who is None or tree.strings.get(tree.who[i]) == who) and (status is None or WBS.statusToStr(tree.status[i]) == status)
+      matched[i + 1]=matched[i] + match
+    def rolledUp(i) :
+      if tree.firstChild[i] == WBS.NONE :
+        return(False)
+      return((maxDepth is not None and tree.level[i] - tree.level[root] >= maxDepth) or (collapseDone and tree.status[i] >= 100))
+    hidden=array('b',[0]) * end
+    expected=[]
+    for i in range(root,end) :
+      if i != root :
+        hidden[i]=hidden[tree.parent[i]] or rolledUp(tree.parent[i])
+      if not hidden[i] and (i == root or matched[i + index.size[i]] > matched[i]) :
+        expected.append((i,rolledUp(i)))
+    shown=list(view.walk(root))
+    same=shown == expected and wbsStatuses(wbs.getValue()) == [statuses[i] for i,rolledUp in shown]
+    if not same :
+      failures += 1
+    print("{:15s} {:8d} {:10.3f} {:10d}{:s}".format(name,len(shown),elapsed,len(sink.getValue()) >> 10,"" if same else " DIFFER"))
+  if failures :
+    sys.exit(1)
+
+#----------------------------------------------------
+def wbsStatuses(wbs) :
+  # status drawn for each task of a WBS diagram, in order
+  return([line.rsplit("\\n",1)[-1] for line in wbs.splitlines() if line.startswith("*")])
+
+#----------------------------------------------------
+def peakMemory() :
+  # peak resident size of this process in bytes (KiB on Linux)
+  peak=resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+  return(peak if sys.platform == "darwin" else peak << 10)
+
+#----------------------------------------------------
+def fPhases(args) :
+  # Seconds of each phase of a scan and the peak memory once it is over,
+  # as a JSON line : the suite runs it in a fresh process for each size,
+  # on a plan it wrote, so that the peak is the scan's
+  from wbsplan.Schedule import Scheduler
+  from wbsplan.Load import LoadTable
+  with tempfile.TemporaryDirectory() as tmp :
+    plan=args.plan or writeSyntheticPlan(tmp,args.size,args.seed,**syntheticOptions(args))
+    tree=WBS.Tree()
+    opts=argparse.Namespace(fix=True,dump=False)
+    phases=[
+      ("build",lambda : WBS.build(plan,tree)),
+      ("percolate",lambda : WBS.Percolator(opts,tree)),
+      ("schedule",lambda : Scheduler(tree,738521 + 365)),
+      ("load",lambda : LoadTable(tree)),
+      ("wbs",lambda : WBS.WbsGenerator(opts,tree).treeToWbs(Sinks.FileSink(os.devnull))),
+      ("gantt",lambda : WBS.GanttGenerator(opts,tree).treeToGantt(Sinks.FileSink(os.devnull))),
+    ]
+    result={'tasks' : args.size,'seconds' : {},'peak' : {'start' : peakMemory()}}
+    for name,run in phases :
+      t0=time.perf_counter()
+      run()
+      result['seconds'][name]=time.perf_counter() - t0
+      result['peak'][name]=peakMemory()
+  print(json.dumps(result))
+
+#----------------------------------------------------
+def fSuite(args) :
+  # Every phase at each size, each size in a fresh process so that its peak
+  # memory is its own. The run is appended to the results file and
+  # compared with the last run of the same options there.
+  options=dict(syntheticOptions(args),seed=args.seed)
+  here=os.path.abspath(__file__)
+  try :
+    with open(args.results) as f :
+      runs=json.load(f)
+  except FileNotFoundError :
+    runs=[]
+  previous=next((run for run in reversed(runs) if run['options'] == options),None)
+  run={
+    'date' : time.strftime("%Y-%m-%dT%H:%M:%S"),
+    'python' : platform.python_version(),
+    'commit' : gitCommit(),
+    'options' : options,
+    'sizes' : {},
+  }
+  print("{:>8s} {:>10s} {:>10s} {:>12s} {:>8s}".format("tasks","phase","seconds","peak MB","previous"))
+  regressions=0
+  for size in args.sizes :
+    with tempfile.TemporaryDirectory() as tmp :
+      plan=writeSyntheticPlan(tmp,size,args.seed,**syntheticOptions(args))
+      output=subprocess.check_output([sys.executable,here,"phases","--size",str(size),"--plan",plan])
+    result=json.loads(output)
+    run['sizes'][str(size)]=result
+    before=previous['sizes'].get(str(size)) if previous else None
+    for phase,seconds in result['seconds'].items() :
+      ratio=seconds / before['seconds'][phase] if before and before['seconds'].get(phase) else None
+      slower=ratio is not None and ratio > args.threshold and seconds > 0.01
+      regressions += slower
+      print("{:8d} {:>10s} {:10.3f} {:12.1f} {:>8s}{:s}".format(
+        size,
+        phase,
+        seconds,
+        result['peak'][phase] / (1 << 20),
+        "x{:.2f}".format(ratio) if ratio is not None else "-",
+        " SLOWER" if slower else "",
+      ))
+  runs.append(run)
+  with open(args.results,"w") as f :
+    json.dump(runs,f,indent=1)
+  if previous :
+    print("compared with the run of {:s} ({:s}), {:d} phases slower than x{:.2f}".format(previous['date'],previous['commit'] or "no commit",regressions,args.threshold))
+  if regressions and args.strict :
+    sys.exit(1)
+
+#----------------------------------------------------
+def gitCommit() :
+  try :
+    return(subprocess.check_output(["git","rev-parse","--short","HEAD"],cwd=os.path.dirname(os.path.abspath(__file__)),stderr=subprocess.DEVNULL).decode().strip())
+  except (OSError,subprocess.CalledProcessError) :
+    return(None)
+
+#----------------------------------------------------
+def addSyntheticOptions(parser) :
+  parser.add_argument('--seed',help="random seed",type=int,default=0)
+  parser.add_argument('--depth',help="levels of the plan",type=int,default=8)
+  parser.add_argument('--branching',help="mean children of a task",type=int,default=5)
+  parser.add_argument('--missing',help="share of dates left empty",type=float,default=0.3)
+  parser.add_argument('--includes',help="share of tasks whose subtree is an included file",type=float,default=0.001)
+  parser.add_argument('--directions',help="share of tasks marked + or -",type=float,default=0.2)
+
+#----------------------------------------------------
+def main() :
+  parser = argparse.ArgumentParser()
+  subparsers = parser.add_subparsers(help='sub-command help')
+
+  parserLoad = subparsers.add_parser('load', help='time build() from 1k to 1M rows')
+  parserLoad.set_defaults(func=fLoad)
+  parserLoad.add_argument('--sizes',help="plan sizes",type=int,nargs="+",default=[1000,10000,100000,1000000])
+  parserLoad.add_argument('--branching',help="children per task",type=int,default=10)
+
+  parserMemory = subparsers.add_parser('memory', help='memory held by the loaded tree per task')
+  parserMemory.set_defaults(func=fMemory)
+  parserMemory.add_argument('--sizes',help="plan sizes",type=int,nargs="+",default=[10000,100000])
+  parserMemory.add_argument('--branching',help="children per task",type=int,default=10)
+
+  parserShape = subparsers.add_parser('shape', help='time every pass on a deep chain and a wide fan-out')
+  parserShape.set_defaults(func=fShape)
+  parserShape.add_argument('--deep',help="length of the chain",type=int,default=100000)
+  parserShape.add_argument('--wide',help="children of the root",type=int,default=1000000)
+
+  parserEquiv = subparsers.add_parser('equiv', help='check the fused percolation against percolate then fix')
+  parserEquiv.set_defaults(func=fEquiv)
+  parserEquiv.add_argument('--size',help="tasks per plan",type=int,default=20000)
+  parserEquiv.add_argument('--seeds',help="number of random plans",type=int,default=20)
+
+  parserUpdate = subparsers.add_parser('update', help='time incremental updates and check them against a full percolation')
+  parserUpdate.set_defaults(func=fUpdate)
+  parserUpdate.add_argument('--size',help="tasks in the plan",type=int,default=200000)
+  parserUpdate.add_argument('--updates',help="number of updates",type=int,default=1000)
+  parserUpdate.add_argument('--seed',help="random seed",type=int,default=0)
+  parserUpdate.add_argument('--no-fix',help="percolate without fix",dest="fix",action="store_false",default=True)
+
+  parserIncludes = subparsers.add_parser('includes', help='time parallel loading of included files and check it against build()')
+  parserIncludes.set_defaults(func=fIncludes)
+  parserIncludes.add_argument('--files',help="number of included files",type=int,default=16)
+  parserIncludes.add_argument('--size',help="tasks per included file",type=int,default=20000)
+  parserIncludes.add_argument('--jobs',help="worker processes",type=int,default=os.cpu_count())
+
+  parserOutput = subparsers.add_parser('output', help='peak memory of WBS and Gantt generation')
+  parserOutput.set_defaults(func=fOutput)
+  parserOutput.add_argument('--sizes',help="plan sizes",type=int,nargs="+",default=[10000,100000,1000000])
+  parserOutput.add_argument('--jobs',help="rendering processes",type=int,default=1)
+
+  parserRender = subparsers.add_parser('render', help='time the render cache and check it against uncached rendering')
+  parserRender.set_defaults(func=fRender)
+  parserRender.add_argument('--size',help="tasks in the plan",type=int,default=100000)
+  parserRender.add_argument('--seed',help="random seed",type=int,default=0)
+
+  parserImports = subparsers.add_parser('imports', help='check the import time of the package against its budget')
+  parserImports.set_defaults(func=fImports)
+  parserImports.add_argument('--package',help="budget of import wbsplan in ms",type=float,default=10)
+  parserImports.add_argument('--plan',help="budget of import wbsplan.Plan in ms",type=float,default=60)
+
+  parserServe = subparsers.add_parser('serve', help='check the answers of the render server, malformed requests included')
+  parserServe.set_defaults(func=fServe)
+  parserServe.add_argument('--size',help="tasks in the plan",type=int,default=1000)
+  parserServe.add_argument('--seed',help="random seed",type=int,default=0)
+
+  parserQuery = subparsers.add_parser('query', help='time indexed lookups and check them against full scans')
+  parserQuery.set_defaults(func=fQuery)
+  parserQuery.add_argument('--size',help="tasks in the plan",type=int,default=100000)
+  parserQuery.add_argument('--queries',help="number of queries",type=int,default=100)
+  parserQuery.add_argument('--seed',help="random seed",type=int,default=0)
+
+  parserSchedule = subparsers.add_parser('schedule', help='time the schedule passes over plans with dependencies')
+  parserSchedule.set_defaults(func=fSchedule)
+  parserSchedule.add_argument('--sizes',help="plan sizes",type=int,nargs="+",default=[10000,100000,500000])
+  parserSchedule.add_argument('--dependencies',help="probability of each further dependency of a task",type=float,default=0.6)
+  parserSchedule.add_argument('--seed',help="random seed",type=int,default=0)
+
+  parserResources = subparsers.add_parser('resources', help='time the load of the owners and check it against a day by day count')
+  parserResources.set_defaults(func=fResources)
+  parserResources.add_argument('--size',help="tasks in the plan",type=int,default=100000)
+  parserResources.add_argument('--days',help="days the starts are spread over",type=int,default=3 * 365)
+  parserResources.add_argument('--capacity',help="load an owner is overloaded above",type=float,default=1)
+  parserResources.add_argument('--seed',help="random seed",type=int,default=0)
+
+  parserGenerate = subparsers.add_parser('generate', help='write a synthetic plan and its included files')
+  parserGenerate.set_defaults(func=fGenerate)
+  parserGenerate.add_argument('--output','-o',help="directory of the plan",required=True)
+  parserGenerate.add_argument('--size',help="tasks in the plan",type=int,default=10000)
+  addSyntheticOptions(parserGenerate)
+
+  parserPhases = subparsers.add_parser('phases', help='time each phase of a scan of a synthetic plan, as JSON')
+  parserPhases.set_defaults(func=fPhases)
+  parserPhases.add_argument('--size',help="tasks in the plan",type=int,default=10000)
+  parserPhases.add_argument('--plan',help="plan of size tasks, a synthetic one is written by default",default=None)
+  addSyntheticOptions(parserPhases)
+
+  parserViews = subparsers.add_parser('views', help='time depth limited, filtered and collapsed views and check the tasks they show')
+  parserViews.set_defaults(func=fViews)
+  parserViews.add_argument('--size',help="tasks in the plan",type=int,default=200000)
+  addSyntheticOptions(parserViews)
+
+  parserSuite = subparsers.add_parser('suite', help='time each phase from 1k to 1M tasks and compare with the previous run')
+  parserSuite.set_defaults(func=fSuite)
+  parserSuite.add_argument('--sizes',help="plan sizes",type=int,nargs="+",default=[1000,10000,100000,1000000])
+  parserSuite.add_argument('--results',help="file of the stored runs",default="bench-results.json")
+  parserSuite.add_argument('--threshold',help="slowdown ratio reported as a regression",type=float,default=1.2)
+  parserSuite.add_argument('--strict',help="exit with an error on a regression",action="store_true",default=False)
+  addSyntheticOptions(parserSuite)
+
+  args=parser.parse_args()
+  logging.basicConfig(level=logging.ERROR)
+  args.func(args)
+
+#----------------------------------------------------
+if __name__ == '__main__' :
+  main()
@@ -0,0 +1,117 @@
+# Compiled plans : a built and percolated tree saved in binary form, the
+# column arrays and the string table, reused as long as the CSV files it
+# was built from keep the same content.
+#
+# Layout, little endian :
+#   header    magic, version, key, rootLevel, tasks, columns, strings, files,
+#             includes
+#   files     lengths (int32) then utf-8 paths, the plan file last
+#   strings   lengths (int32) then utf-8 texts
+#   padding   to 4 bytes
+#   columns   columns x tasks int32, in Tree.columns order
+#   includes  int32, the first task of each included file
+# The key is a sha256 of the files content and of the build flags.
+
+import os
+import sys
+import mmap
+import struct
+import hashlib
+from array import array
+
+MAGIC=b"WBSC"
+VERSION=2
+HEADER=struct.Struct("<4sI32siiiiii")
+
+#----------------------------------------------------
+def digest(files,flags) :
+  h=hashlib.sha256()
+  h.update(struct.pack("<I",VERSION))
+  h.update(repr(flags).encode())
+  for path in files :
+    h.update(path.encode())
+    with open(path,"rb") as f :
+      h.update(hashlib.sha256(f.read()).digest())
+  return(h.digest())
+
+#----------------------------------------------------
+def packStrings(strings) :
+  encoded=[s.encode() for s in strings]
+  lengths=array('i',map(len,encoded))
+  return(toLittle(lengths) + b"".join(encoded))
+
+#----------------------------------------------------
+def unpackStrings(buffer,offset,count) :
+  lengths=fromLittle(buffer[offset:offset + 4 * count])
+  offset += 4 * count
+  strings=[]
+  for n in lengths :
+    strings.append(str(buffer[offset:offset + n],"utf-8"))
+    offset += n
+  return(strings,offset)
+
+#----------------------------------------------------
+def toLittle(values) :
+  if sys.byteorder != "little" :
+    values=array('i',values)
+    values.byteswap()
+  return(values.tobytes())
+
+#----------------------------------------------------
+def fromLittle(buffer) :
+  values=array('i')
+  values.frombytes(buffer)
+  if sys.byteorder != "little" :
+    values.byteswap()
+  return(values)
+
+#----------------------------------------------------
+def save(fileName,files,flags,packed) :
+  # Written aside then renamed : a reader never sees a partial file
+  rootLevel,strings,columns,includes=packed
+  size=len(columns[0]) if columns else 0
+  body=packStrings(files) + packStrings(strings)
+  body += b"\0" * (-len(body) % 4)
+  temporary=fileName + ".tmp"
+  with open(temporary,"wb") as f :
+    f.write(HEADER.pack(MAGIC,VERSION,digest(files,flags),rootLevel,size,len(columns),len(strings),len(files),len(includes)))
+    f.write(body)
+    for column in columns :
+      f.write(toLittle(column))
+    f.write(toLittle(includes))
+  os.replace(temporary,fileName)
+
+#----------------------------------------------------
+def load(fileName,csvFile,flags) :
+  # The packed tree saved for csvFile with the same flags, None when there
+  # is none or when any of its files changed since
+  try :
+    with open(fileName,"rb") as f, mmap.mmap(f.fileno(),0,access=mmap.ACCESS_READ) as m :
+      with memoryview(m) as buffer :
+        return(loadMapped(buffer,csvFile,flags))
+  except (OSError,ValueError) :
+    return(None)
+
+#----------------------------------------------------
+def loadMapped(buffer,csvFile,flags) :
+  # Errors are dealt with here : no slice of the mapping may outlive it
+  try :
+    magic,version,key,rootLevel,size,columnCount,stringCount,fileCount,includeCount=HEADER.unpack_from(buffer)
+    if magic != MAGIC or version != VERSION :
+      return(None)
+    files,offset=unpackStrings(buffer,HEADER.size,fileCount)
+    if not files or files[-1] != os.path.realpath(csvFile) or digest(files,flags) != key :
+      return(None)
+    strings,offset=unpackStrings(buffer,offset,stringCount)
+    offset += -offset % 4
+    columns=[]
+    for k in range(columnCount) :
+      columns.append(fromLittle(buffer[offset:offset + 4 * size]))
+      offset += 4 * size
+    includes=fromLittle(buffer[offset:offset + 4 * includeCount])
+    offset += 4 * includeCount
+    if offset != len(buffer) :
+      return(None)
+    return((rootLevel,strings,columns,includes))
+  except (OSError,ValueError,struct.error) :
+    return(None)
@@ -0,0 +1,250 @@
+import os
+import time
+import logging
+import argparse
+from array import array
+from .Plan import PlanError,STATUS_CLASSES,CRITICAL,LATE,BACKLOG_LATE,BLOCKED,UNSET,loadPlan,parseDate,dateToStr
+from .Trace import Trace,setTrace
+from .Generators import generate
+from .Sinks import openSink
+from .RenderCache import RenderCache
+from .View import View,contains
+
+#----------------------------------------------------
+def fScan(args) :
+  if args.trace :
+    try :
+      setTrace(args.trace)
+    except ValueError as e :
+      raise PlanError(str(e))
+  metrics=None
+  if args.metrics :
+    from .Metrics import Metrics
+    metrics=Metrics(args.profile)
+  elif args.profile :
+    raise PlanError("--profile goes with --metrics")
+  t0=time.perf_counter()
+  c0=time.process_time()
+  tree=loadPlan(args.file,fix=args.fix,jobs=args.jobs,cache=args.cache,dump=args.dump,metrics=metrics)
+  if args.schedule :
+    if metrics :
+      with metrics.phase('schedule') :
+        schedule(args,tree)
+    else :
+      schedule(args,tree)
+  # --wbs and --gantt alone go to --output
+  outputs=[]
+  for format,fileName in (('wbs',args.wbs),('gantt',args.gantt)) :
+    if fileName :
+      outputs.append((format,args.output if fileName == "-" else fileName))
+  cache=RenderCache(args.render_cache,args.render_cache_size << 20) if args.render_cache else None
+  root,view=getView(args,tree)
+  try :
+    if metrics :
+      with metrics.phase('render') :
+        generate(tree,outputs,args,cache,args.jobs,root,metrics=metrics,view=view)
+    else :
+      generate(tree,outputs,args,cache,args.jobs,root,view=view)
+  except OSError as e :
+    raise PlanError(str(e))
+  if cache :
+    Trace("render").info("render cache %s",cache.toString)
+  if metrics :
+    metrics.add('total',time.perf_counter() - t0,time.process_time() - c0)
+    try :
+      with openSink(args.metrics) as sink :
+        metrics.write(sink)
+    except OSError as e :
+      raise PlanError(str(e))
+
+#----------------------------------------------------
+def schedule(args,tree) :
+  from .Schedule import Scheduler
+  try :
+    today=parseDate(args.today) if args.today else None
+  except ValueError as e :
+    raise PlanError("--today : " + str(e))
+  return(Scheduler(tree,today))
+
+#----------------------------------------------------
+def getView(args,tree) :
+  # task the diagrams start from, and the View pruning them if any option
+  # asks for one
+  root=0
+  if args.root :
+    root=tree.getTaskIndex().find(args.root)
+    if root is None :
+      raise PlanError("unknown task <{:s}>".format(args.root))
+  if args.max_depth is None and args.owner is None and args.status is None and not args.collapse_done :
+    return(root,None)
+  if args.max_depth is not None and args.max_depth < 0 :
+    raise PlanError("--max-depth : expected 0 or more")
+  return(root,View(tree,args.max_depth,args.owner,args.status,args.collapse_done))
+
+#----------------------------------------------------
+def fQuery(args) :
+  # Tasks matching every criterion given, in document order
+  tree=loadPlan(args.file,fix=args.fix,jobs=args.jobs,cache=args.cache)
+  scheduler=schedule(args,tree) if args.critical or args.late else None
+  index=tree.getTaskIndex()
+  def find(taskId) :
+    i=index.find(taskId)
+    if i is None :
+      raise PlanError("unknown task <{:s}>".format(taskId))
+    return(i)
+  if args.is_under :
+    x,y=[find(taskId) for taskId in args.is_under]
+    print("{:s} is {:s}under {:s}".format(args.is_under[0],"" if index.isUnder(x,y) else "not ",args.is_under[1]))
+    return
+  lists=[]
+  if args.id :
+    lists.append([find(args.id)])
+  if args.owner :
+    lists.append(index.getOwned(args.owner))
+  if args.status :
+    lists.append(index.getStatus(args.status))
+  if args.critical :
+    lists.append(array('i',(i for i,tag in enumerate(tree.tags) if tag & CRITICAL)))
+  if args.late :
+    lists.append(array('i',(i for i,tag in enumerate(tree.tags) if tag & (LATE | BACKLOG_LATE | BLOCKED))))
+  if args.under :
+    j=find(args.under)
+    lists=[index.inSubtree(tasks,j) for tasks in lists] or [index.getSubtree(j)]
+  if not lists :
+    lists=[range(tree.getSize())]
+  # the shortest list, kept where the others have the task too
+  lists.sort(key=len)
+  tasks=[i for i in lists[0] if all(contains(other,i) for other in lists[1:])]
+  if args.count :
+    print(len(tasks))
+    return
+  for i in tasks :
+    row=tree.getNode(i).getRow()
+    if scheduler :
+      # the dates the dependencies allow : earliest start, latest end
+      print(row.toString() + row.getStyle() + " slack " + ("-" if row.getSlack() == UNSET else str(row.getSlack()))
+        + " earliest " + (dateToStr(scheduler.getEarliestStart(i)) or "-")
+        + " latest " + (dateToStr(scheduler.getLatestEnd(i)) or "-"))
+    else :
+      print(row.toString())
+
+#----------------------------------------------------
+def fLoad(args) :
+  # Load of the owners by day or week, and the periods they are overloaded
+  from .Load import LoadTable
+  if args.trace :
+    try :
+      setTrace(args.trace)
+    except ValueError as e :
+      raise PlanError(str(e))
+  try :
+    first,last=[parseDate(d) if d else 0 for d in (args.since,args.until)]
+  except ValueError as e :
+    raise PlanError("--since/--until : " + str(e))
+  tree=loadPlan(args.file,fix=args.fix,jobs=args.jobs,cache=args.cache)
+  table=LoadTable(tree,args.week,first,last)
+  try :
+    if args.table :
+      with openSink(args.table) as sink :
+        table.writeTable(sink)
+    with openSink("-") as sink :
+      table.writeOverloads(sink,args.capacity)
+  except OSError as e :
+    raise PlanError(str(e))
+
+#----------------------------------------------------
+def fServe(args) :
+  import asyncio
+  from .Server import ResidentPlan,RenderServer
+  plans={}
+  for spec in args.plan :
+    name,sep,fileName=spec.rpartition("=")
+    name=name or os.path.splitext(os.path.basename(fileName))[0]
+    plans[name]=ResidentPlan(name,fileName,args.fix)
+  server=RenderServer(plans,args.interval)
+  server.loadAll()
+  try :
+    asyncio.run(server.serve(args.host,args.port,args.socket))
+  except KeyboardInterrupt :
+    pass
+
+#----------------------------------------------------
+def main() :
+  parser = argparse.ArgumentParser()
+
+  subparsers = parser.add_subparsers(help='sub-command help')
+  parser.add_argument('-v', '--verbose',
+                      action='count',
+                      dest='verbose',
+                      default=0,
+                      help="verbose output (repeat for increased verbosity)")
+
+  parserScan = subparsers.add_parser('scan', help='a help')
+  parserScan.set_defaults(func=fScan)
+  parserScan.add_argument('--file','-f',help="file",default="WBS.svt")
+  parserScan.add_argument('--fix',help="Fix errors",action="store_true",default=False)
+  parserScan.add_argument('--wbs',help="Generate WBS, to FILE if given",metavar="FILE",nargs="?",const="-",default=None)
+  parserScan.add_argument('--gantt',help="Generate Gantt, to FILE if given",metavar="FILE",nargs="?",const="-",default=None)
+  parserScan.add_argument('--output','-o',help="Output file of the diagrams, stdout by default, gzip if it ends in .gz",default="-")
+  parserScan.add_argument('--jobs','-j',help="Processes parsing the included files and rendering the diagrams in parallel",type=int,default=1)
+  parserScan.add_argument('--cache',help="Compiled plan file, reused while the CSV files are unchanged",default=None)
+  parserScan.add_argument('--render-cache',help="Directory of rendered fragments reused for unchanged subtrees",default=None)
+  parserScan.add_argument('--render-cache-size',help="Size of the render cache in MB",type=int,default=64)
+  parserScan.add_argument('--schedule',help="Tag late, backlog late, blocked and critical tasks in the diagrams",action="store_true",default=False)
+  parserScan.add_argument('--today',help="Date the tasks are late against, YYYY-MM-DD, today by default",default=None)
+  parserScan.add_argument('--metrics',help="Write wall and CPU time of each phase and counters as JSON to FILE, '-' for stdout",metavar="FILE",default=None)
+  parserScan.add_argument('--profile',help="Profile a phase with cProfile, its top functions go to the metrics",choices=('build','percolate','schedule','render'),default=None)
+  parserScan.add_argument('--root',help="Draw the subtree of this task id",metavar="ID",default=None)
+  parserScan.add_argument('--max-depth',help="Levels drawn under the root, the tasks of the last one standing for their subtree",metavar="N",type=int,default=None)
+  parserScan.add_argument('--owner',help="Draw the tasks of this owner and the tasks leading to them",default=None)
+  parserScan.add_argument('--status',help="Draw the tasks of this status class and the tasks leading to them",choices=STATUS_CLASSES,default=None)
+  parserScan.add_argument('--collapse-done',help="Draw a Done task alone, standing for its subtree",action="store_true",default=False)
+  parserScan.add_argument('--dump',help="Dump the tree once loaded",action="store_true",default=False)
+  parserScan.add_argument('--trace',help="Trace phases : all or phase[:info|debug],... with phases build, percolate, fix, schedule, load, render",nargs="?",const="all",default=None)
+
+  parserQuery = subparsers.add_parser('query', help='list the tasks of a plan by id, owner, status or subtree')
+  parserQuery.set_defaults(func=fQuery)
+  parserQuery.add_argument('--file','-f',help="file",default="WBS.svt")
+  parserQuery.add_argument('--fix',help="Fix errors",action="store_true",default=False)
+  parserQuery.add_argument('--jobs','-j',help="Processes parsing the included files in parallel",type=int,default=1)
+  parserQuery.add_argument('--cache',help="Compiled plan file, reused while the CSV files are unchanged",default=None)
+  parserQuery.add_argument('--id',help="Task with this id",default=None)
+  parserQuery.add_argument('--owner',help="Tasks of this owner",default=None)
+  parserQuery.add_argument('--status',help="Tasks of this status class",choices=STATUS_CLASSES,default=None)
+  parserQuery.add_argument('--under',help="Tasks of the subtree of this task id, the task included",metavar="ID",default=None)
+  parserQuery.add_argument('--is-under',help="Tell whether task X is in the subtree of task Y",nargs=2,metavar=("X","Y"),default=None)
+  parserQuery.add_argument('--critical',help="Tasks of the critical path",action="store_true",default=False)
+  parserQuery.add_argument('--late',help="Late, backlog late and blocked tasks",action="store_true",default=False)
+  parserQuery.add_argument('--today',help="Date the tasks are late against, YYYY-MM-DD, today by default",default=None)
+  parserQuery.add_argument('--count',help="Only print the number of tasks",action="store_true",default=False)
+
+  parserLoad = subparsers.add_parser('load', help='load of the owners by day or week and their overloads')
+  parserLoad.set_defaults(func=fLoad)
+  parserLoad.add_argument('--file','-f',help="file",default="WBS.svt")
+  parserLoad.add_argument('--fix',help="Fix errors",action="store_true",default=False)
+  parserLoad.add_argument('--jobs','-j',help="Processes parsing the included files in parallel",type=int,default=1)
+  parserLoad.add_argument('--cache',help="Compiled plan file, reused while the CSV files are unchanged",default=None)
+  parserLoad.add_argument('--week',help="Load by week, mean of the days from Monday",action="store_true",default=False)
+  parserLoad.add_argument('--capacity',help="Load an owner is overloaded above",type=float,default=1)
+  parserLoad.add_argument('--since',help="First day, YYYY-MM-DD, the first start by default",default=None)
+  parserLoad.add_argument('--until',help="Last day, YYYY-MM-DD, the last end by default",default=None)
+  parserLoad.add_argument('--table',help="Write the load table (csv) to FILE, '-' for stdout",metavar="FILE",default=None)
+  parserLoad.add_argument('--trace',help="Trace phases : all or phase[:info|debug],...",nargs="?",const="all",default=None)
+
+  parserServe = subparsers.add_parser('serve', help='serve WBS and Gantt of plans kept in memory')
+  parserServe.set_defaults(func=fServe)
+  parserServe.add_argument('--plan','-p',help="Plan to serve as [NAME=]FILE, NAME defaults to the file name",action="append",required=True)
+  parserServe.add_argument('--fix',help="Fix errors",action="store_true",default=False)
+  parserServe.add_argument('--host',help="Address to listen on",default="127.0.0.1")
+  parserServe.add_argument('--port',help="Port to listen on",type=int,default=8080)
+  parserServe.add_argument('--socket',help="Unix socket to listen on instead of a port",default=None)
+  parserServe.add_argument('--interval',help="Seconds between two looks at the plan files",type=float,default=1.0)
+
+  args=parser.parse_args()
+  loglevel=[logging.WARNING,logging.INFO,logging.DEBUG,1]
+  logging.basicConfig(format="%(asctime)s %(module)s %(name)s  %(funcName)s %(lineno)s %(levelname)s %(message)s", level=loglevel[args.verbose])
+  logging.log(1,'Deep debug')
+  try :
+    args.func(args)
+  except PlanError as e :
+    parser.exit(1,"{:s}\n".format(str(e)))
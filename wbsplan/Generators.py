@@ -0,0 +1,436 @@
+import zlib
+import hashlib
+from .Plan import FINISH_TO_START
+from .Traversal import NONE,preOrder,subtreeSizes
+from .Sinks import StdoutSink,SpoolSink,openSink
+
+#============================================
+class Generation() :
+  # A single pre-order walk feeding every registered generator : each task
+  # is visited and viewed once, whatever the number of outputs. A generator
+  # gives headChunk(root), nodeChunk(node,row), tailChunk() and
+  # getCacheKey(), root being the Node the diagram starts from.
+  #
+  # With a RenderCache, the small subtrees are rendered by groups of
+  # consecutive siblings of at most UNIT tasks, stored under a hash of their
+  # columns : an unchanged group is copied from the cache and its tasks
+  # are not visited. A group also ends after a task whose id hashes to a
+  # multiple of BOUNDARY, so inserting a task only changes its own group.
+  #
+  # With jobs processes and no cache, the tasks are cut in ranges of the
+  # pre-order rendered by a pool and written back in order. A task renders
+  # from its own row and its parent's, which every process holds : the
+  # ranges are independent and the output is the serial one.
+  #
+  # With a View, only the tasks it shows are visited, in a single walk
+  # pruned as it goes : the cache and the processes are not used.
+  UNIT=1024
+  BOUNDARY=64
+  RANGES_PER_JOB=4
+  MIN_RANGE=256
+  #----------------------------------------------------
+  def __init__(self,tree,cache=None,jobs=1,view=None) :
+    self.tree=tree
+    self.cache=cache
+    self.jobs=jobs
+    self.view=view
+    self.outputs=[]
+
+  #----------------------------------------------------
+  def add(self,generator,sink) :
+    self.outputs.append((generator,sink))
+    return(self)
+
+  #----------------------------------------------------
+  def run(self,root=0) :
+    tree=self.tree
+    outputs=self.outputs
+    self.root=root
+    for generator,sink in outputs :
+      sink.write(generator.headChunk(tree.getNode(root)))
+    if self.view is not None :
+      for i,rolledUp in self.view.walk(root) :
+        node=tree.getNode(i)
+        row=node.getRolledUpRow() if rolledUp else node.getRow()
+        for generator,sink in outputs :
+          sink.write(generator.nodeChunk(node,row))
+    elif self.cache is not None :
+      self.runCached(root)
+    elif self.jobs > 1 :
+      self.runParallel(root)
+    else :
+      for i in preOrder(tree,root) :
+        node=tree.getNode(i)
+        row=node.getRow()
+        for generator,sink in outputs :
+          sink.write(generator.nodeChunk(node,row))
+    for generator,sink in outputs :
+      sink.write(generator.tailChunk())
+      sink.flush()
+
+  #----------------------------------------------------
+  def runCached(self,root) :
+    # Walk by index, tasks being stored in pre-order : a task with a large
+    # subtree is rendered alone and its children follow, the small
+    # subtrees are rendered by groups
+    tree=self.tree
+    size=subtreeSizes(tree)
+    nextSibling=tree.nextSibling
+    end=root + size[root]
+    i=root
+    while i < end :
+      if size[i] > Generation.UNIT :
+        self.render(i,i + 1,[(generator,sink.write) for generator,sink in self.outputs])
+        i += 1
+        continue
+      last=i
+      total=size[i]
+      while True :
+        s=nextSibling[last]
+        if s == NONE or s >= end or size[s] > Generation.UNIT or total + size[s] > Generation.UNIT :
+          break
+        if zlib.crc32(tree.strings.get(tree.id[last]).encode()) % Generation.BOUNDARY == 0 :
+          break
+        last=s
+        total += size[s]
+      self.renderGroup(i,last + size[last])
+      i=last + size[last]
+
+  #----------------------------------------------------
+  def runParallel(self,root) :
+    end=root + subtreeSizes(self.tree)[root]
+    step=max(Generation.MIN_RANGE,-(-(end - root) // (self.jobs * Generation.RANGES_PER_JOB)))
+    firsts=range(root,end,step)
+    lasts=[min(first + step,end) for first in firsts]
+    generators=[generator for generator,sink in self.outputs]
+    # the tree goes once to each process, through fork when available
+    import concurrent.futures
+    with concurrent.futures.ProcessPoolExecutor(self.jobs,initializer=startRenderer,initargs=(self.tree,generators)) as pool :
+      for texts in pool.map(renderRange,firsts,lasts) :
+        for (generator,sink),text in zip(self.outputs,texts) :
+          sink.write(text)
+
+  #----------------------------------------------------
+  def renderGroup(self,first,last) :
+    missing=[]
+    for generator,sink in self.outputs :
+      key=self.getKey(generator,first,last)
+      text=self.cache.get(key)
+      if text is None :
+        missing.append((generator,[],key,sink))
+      else :
+        sink.write(text)
+    if missing :
+      self.render(first,last,[(generator,chunks.append) for generator,chunks,key,sink in missing])
+      for generator,chunks,key,sink in missing :
+        text="".join(chunks)
+        self.cache.put(key,text)
+        sink.write(text)
+
+  #----------------------------------------------------
+  def render(self,first,last,outputs) :
+    # tasks first..last-1 to each (generator,write) output
+    tree=self.tree
+    for i in range(first,last) :
+      node=tree.getNode(i)
+      row=node.getRow()
+      for generator,write in outputs :
+        write(generator.nodeChunk(node,row))
+
+  #----------------------------------------------------
+  def getKey(self,generator,first,last) :
+    # everything the tasks first..last-1 may be rendered from, including
+    # their parent which Gantt links refer to
+    tree=self.tree
+    strings=tree.strings
+    h=hashlib.blake2b(digest_size=20)
+    h.update(generator.getCacheKey().encode())
+    h.update(b"root" if first == self.root else b"")
+    for column in tree.values :
+      h.update(getattr(tree,column)[first:last].tobytes())
+    for column in tree.texts :
+      h.update("\0".join(map(strings.get,getattr(tree,column)[first:last])).encode())
+    # and the tasks they depend on, drawn when in the diagram
+    index=tree.getTaskIndex()
+    for i in range(first,last) :
+      for j,kind,lag in tree.getDependencies(i) :
+        h.update("{:d},{:s}\0".format(index.isUnder(j,self.root),strings.get(tree.desc[j])).encode())
+    p=tree.parent[first]
+    if p != NONE :
+      h.update("{:d},{:d},{:d},{:s}".format(tree.level[p],tree.start[p],tree.status[p],strings.get(tree.desc[p])).encode())
+    return(h.hexdigest())
+
+#----------------------------------------------------
+# Worker side of Generation.runParallel
+renderer=None
+
+#----------------------------------------------------
+def startRenderer(tree,generators) :
+  global renderer
+  renderer=Generation(tree)
+  for generator in generators :
+    renderer.add(generator,None)
+
+#----------------------------------------------------
+def renderRange(first,last) :
+  chunks=[[] for output in renderer.outputs]
+  renderer.render(first,last,[(generator,c.append) for (generator,sink),c in zip(renderer.outputs,chunks)])
+  return(["".join(c) for c in chunks])
+
+#============================================
+class GanttGenerator() :
+  head='''
+@startuml
+<style>
+wbsDiagram {
+  .group {
+      RoundCorner 40
+  }
+  .backlog {
+      BackgroundColor silver
+  }
+  .backlogLate {
+      BackgroundColor red
+  }
+  .runningLate {
+      BackgroundColor red
+  }
+  .done {
+      BackgroundColor green
+  }
+  .critical {
+    BackgroundColor orange
+    LineColor red
+    LineThickness 5.0
+  }
+  .neutral {
+      BackgroundColor white
+  }
+}
+</style>
+saturday are closed
+sunday are closed
+'''
+  tail="@enduml"
+
+  levelToArrow = {
+     0 : ' bold black ',
+     1 : ' dashed blue ',
+     2 : ' dotted yellow ',
+     3 : ' dotted grey  ',
+     4 : ' grey ',
+     5 : ' grey ',
+     6 : ' grey ',
+     7 : ' grey ',
+     8 : ' grey ',
+     9 : ' grey '
+   }
+
+  # colors of the .critical, .runningLate and .backlogLate styles
+  styleToColor = {
+     'critical' : 'Orange/Red',
+     'late' : 'Red',
+     'backlogLate' : 'Red',
+   }
+
+  #----------------------------------------------------
+  def __init__(self,args,tree,view=None) :
+    self.args=args
+    self.tree=tree
+    self.view=view
+
+  #----------------------------------------------------
+  def treeToGantt(self,sink=None) :
+    # the Gantt alone, Generation feeds several outputs in one walk
+    Generation(self.tree).add(self,sink or StdoutSink()).run()
+
+  #----------------------------------------------------
+  def headChunk(self,root) :
+    # a subtree is drawn as a project of its own
+    self.root=root.getIndex()
+    return(GanttGenerator.head + "\nproject starts " + root.getRow().getStartStr() + "\n")
+
+  #----------------------------------------------------
+  def tailChunk(self) :
+    return(GanttGenerator.tail + "\n")
+
+  #----------------------------------------------------
+  def getCacheKey(self) :
+    return("gantt" + GanttGenerator.head)
+
+  #----------------------------------------------------
+  def nodeChunk(self,node,row) :
+    return(self.nodeToGantt(node,row) + "\n")
+
+  #----------------------------------------------------
+  def nodeToGantt(self,node,row) :
+    desc="[" + row.getDesc() + "]"
+    ganttLines=[]
+    if row.getStart() :
+      ganttLines.append(desc + " starts " + row.getStartStr())
+    if row.getEnd() :
+      ganttLines.append(desc + " ends " + row.getEndStr())
+    #[Observability] starts 4 day after [Global Project]'s start with dotted blue link
+    parent=node.getParent() if node.getIndex() != self.root else None
+    if parent :
+      # dates are day ordinals : the delta is a plain subtraction
+      pRow=parent.getRow()
+      if row.getStart() and pRow.getStart() :
+        out="[{:s}] starts {:d} day after [{:s}]'s start with {:s} link".format(
+             row.getDesc(),
+             row.getStart() - pRow.getStart(),
+             pRow.getDesc(),
+             GanttGenerator.levelToArrow.get(parent.getLevel(),' grey '),
+             )
+        ganttLines.append(out)
+      ganttLines.append(desc + " ends " + row.getEndStr())
+    else :
+      if row.getStart() :
+        ganttLines.append(desc + " starts " + row.getStartStr())
+      if row.getEnd() :
+        ganttLines.append(desc + " ends " + row.getEndStr())
+    # dependencies on tasks of the diagram
+    if row.getAfter() :
+      index=self.tree.getTaskIndex()
+      for j,kind,lag in self.tree.getDependencies(node.getIndex()) :
+        shown=self.view.contains(j,self.root) if self.view else index.isUnder(j,self.root)
+        if shown :
+          ganttLines.append("{:s} starts {:s} [{:s}]'s {:s}".format(
+            desc,
+            lagToStr(lag),
+            self.tree.strings.get(self.tree.desc[j]),
+            "end" if kind == FINISH_TO_START else "start",
+          ))
+    # Gantt tasks take colors, not style classes
+    color=GanttGenerator.styleToColor.get(row.getStyle())
+    if color :
+      ganttLines.append(desc + " is colored in " + color)
+    return("\n".join(ganttLines))
+
+
+
+#----------------------------------------------------
+def lagToStr(lag) :
+  # Gantt counts days forward only : a negative lag is days before
+  if lag > 0 :
+    return("{:d} day after".format(lag))
+  if lag < 0 :
+    return("{:d} day before".format(-lag))
+  return("at")
+
+#============================================
+class WbsGenerator() :
+  head='''
+@startwbs
+<style>
+wbsDiagram {
+  .group {
+      RoundCorner 40
+  }
+  .backlog {
+      BackgroundColor silver
+  }
+  .backlogLate {
+      BackgroundColor red
+  }
+  .runningHalf1 {
+      BackgroundColor GreenYellow
+  }
+  .runningHalf2 {
+      BackgroundColor SpringGreen
+  }
+  .late {
+      BackgroundColor red
+  }
+  .done {
+      BackgroundColor green
+  }
+  .critical {
+    BackgroundColor orange
+    LineColor red
+    LineThickness 5.0
+  }
+  .neutral {
+      BackgroundColor white
+  }
+}
+</style>
+'''
+  tail="@endwbs"
+
+  #----------------------------------------------------
+  def __init__(self,args,tree,view=None) :
+    self.args=args
+    self.tree=tree
+    self.view=view
+
+  #----------------------------------------------------
+  def treeToWbs(self,sink=None) :
+    # the WBS alone, Generation feeds several outputs in one walk
+    Generation(self.tree).add(self,sink or StdoutSink()).run()
+
+  #----------------------------------------------------
+  def headChunk(self,root) :
+    # a subtree starts at the first level
+    self.shift=len(root.getRow().getDepth()) - 1
+    return(WbsGenerator.head + "\n")
+
+  #----------------------------------------------------
+  def tailChunk(self) :
+    return(WbsGenerator.tail + "\n")
+
+  #----------------------------------------------------
+  def getCacheKey(self) :
+    return("wbs{:d}".format(self.shift) + WbsGenerator.head)
+
+  #----------------------------------------------------
+  def nodeChunk(self,node,row) :
+    return(row.toWbs(self.shift) + "\n")
+
+#----------------------------------------------------
+FORMATS={
+  'wbs' : WbsGenerator,
+  'gantt' : GanttGenerator,
+}
+
+#----------------------------------------------------
+def generate(tree,outputs,args=None,cache=None,jobs=1,root=0,metrics=None,view=None) :
+  # Render every (format,destination) output of the subtree of root, or of
+  # what view shows of it, in one walk. A destination is
+  # a file name ('-' for stdout, gzip if it ends in .gz) or a Sink. Outputs
+  # sharing a destination follow each other : the later ones are spooled
+  # during the walk and appended once it is over. Metrics count the bytes
+  # each format wrote to its destination.
+  opened=[]
+  targets={}
+  spools=[]
+  written=[]
+  generation=Generation(tree,cache,jobs,view)
+  try :
+    for format,destination in outputs :
+      generator=FORMATS[format](args,tree,view)
+      key=destination if isinstance(destination,str) else id(destination)
+      if key in targets :
+        spools.append((SpoolSink(),targets[key],format))
+        generation.add(generator,spools[-1][0])
+        continue
+      if isinstance(destination,str) :
+        destination=openSink(destination)
+        opened.append(destination)
+      targets[key]=destination
+      generation.add(generator,destination)
+      written.append((format,destination,destination.getWritten()))
+    generation.run(root)
+    if metrics :
+      for format,sink,before in written :
+        metrics.count(format + " bytes",sink.getWritten() - before)
+    for spool,sink,format in spools :
+      before=sink.getWritten() if metrics else 0
+      spool.copyTo(sink)
+      if metrics :
+        metrics.count(format + " bytes",sink.getWritten() - before)
+    if cache :
+      cache.trim()
+  finally :
+    for sink in opened + [spool for spool,sink,format in spools] :
+      sink.close()
@@ -0,0 +1,128 @@
+# Load of the owners over time. A leaf task keeps its owner busy one unit
+# a day from its start to its end, both included : the work of a parent
+# is that of its children. Dates not given are the percolated ones (up
+# values, inherited from the parents) when the rows were not fixed.
+# Neutral tasks (status < 0), tasks without dates or owner are not counted.
+# Each owner has a difference array over the days : +1 the day a task
+# starts, -1 the day after it ends. One pass over the tasks fills them and
+# a running sum per owner gives the daily load, whatever the length of the
+# tasks. By week, the load is the mean of the 7 days from Monday.
+
+from array import array
+from itertools import accumulate
+from datetime import date
+from .Plan import dateToStr
+from .Traversal import NONE
+from .Trace import Trace
+
+#============================================
+class LoadTable() :
+  #----------------------------------------------------
+  def __init__(self,tree,week=False,first=0,last=0) :
+    # first..last : days covered, those of the tasks by default
+    self.tree=tree
+    self.trace=Trace("load")
+    self.step=7 if week else 1
+    self.loads={}
+    self.first=0
+    self.periods=0
+    self.compute(first,last)
+
+  #----------------------------------------------------
+  def compute(self,first,last) :
+    t=self.tree
+    start=array('i',(s or u for s,u in zip(t.start,t.upStart)))
+    end=array('i',(e or u for e,u in zip(t.end,t.upEnd)))
+    status=t.status
+    who=t.who
+    firstChild=t.firstChild
+    tasks=[i for i in range(t.getSize()) if firstChild[i] == NONE and who[i] and start[i] and end[i] >= start[i] and status[i] >= 0]
+    if not tasks :
+      return
+    first=first or min(start[i] for i in tasks)
+    last=last or max(end[i] for i in tasks)
+    if self.step == 7 :
+      first -= date.fromordinal(first).weekday()
+    days=-(-(last - first + 1) // self.step) * self.step
+    diffs={}
+    for i in tasks :
+      s=max(start[i],first) - first
+      e=min(end[i],last) - first + 1
+      if s >= e :
+        continue
+      diff=diffs.get(who[i])
+      if diff is None :
+        diff=diffs[who[i]]=array('i',[0]) * (days + 1)
+      diff[s] += 1
+      diff[e] -= 1
+    for k,diff in diffs.items() :
+      daily=array('i',accumulate(diff[:days]))
+      if self.step == 1 :
+        self.loads[k]=daily
+      else :
+        self.loads[k]=array('d',(sum(daily[d:d + 7]) / 7 for d in range(0,days,7)))
+    self.first=first
+    self.periods=days // self.step
+    self.trace.info("%d tasks of %d owners over %d days",len(tasks),len(diffs),days)
+
+  #----------------------------------------------------
+  def getOwners(self) :
+    strings=self.tree.strings
+    return(sorted(self.loads,key=strings.get))
+
+  #----------------------------------------------------
+  def getLoad(self,who) :
+    # load of each period, empty for an owner without tasks
+    k=self.tree.strings.indexes.get(who)
+    return(self.loads.get(k,array('i')))
+
+  #----------------------------------------------------
+  def getPeriodStr(self,p) :
+    return(dateToStr(self.first + p * self.step))
+
+  #----------------------------------------------------
+  def getOverloads(self,capacity=1) :
+    # (owner,first period,last period,peak) of each run of periods where
+    # an owner has more load than capacity
+    overloads=[]
+    for k in self.getOwners() :
+      load=self.loads[k]
+      p=0
+      while p < self.periods :
+        if load[p] <= capacity :
+          p += 1
+          continue
+        q=p
+        while q + 1 < self.periods and load[q + 1] > capacity :
+          q += 1
+        overloads.append((self.tree.strings.get(k),p,q,max(load[p:q + 1])))
+        p=q + 1
+    return(overloads)
+
+  #----------------------------------------------------
+  def writeTable(self,sink) :
+    # csv : a line per period, a column per owner
+    strings=self.tree.strings
+    owners=self.getOwners()
+    format="{:d}" if self.step == 1 else "{:.2f}"
+    sink.write(",".join(["period"] + [strings.get(k) for k in owners]) + "\n")
+    loads=[self.loads[k] for k in owners]
+    for p in range(self.periods) :
+      sink.write(",".join([self.getPeriodStr(p)] + [format.format(load[p]) for load in loads]) + "\n")
+    sink.flush()
+
+  #----------------------------------------------------
+  def writeOverloads(self,sink,capacity=1) :
+    unit="week" if self.step == 7 else "day"
+    for who,p,q,peak in self.getOverloads(capacity) :
+      sink.write("{:s} over {:g} from {:s} to {:s} : {:d} {:s}{:s}, peak {:g}\n".format(
+        who,
+        capacity,
+        self.getPeriodStr(p),
+        dateToStr(self.first + (q + 1) * self.step - 1),
+        q - p + 1,
+        unit,
+        "s" if q > p else "",
+        round(peak,2),
+      ))
+    sink.flush()
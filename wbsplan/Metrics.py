@@ -0,0 +1,82 @@
+# Metrics of a run : wall and CPU seconds of each phase, counters, and the
+# cProfile statistics of one phase. Phases may hold parts measured on their
+# own, by wall time only : build is parse + construct + includes (grafting
+# the included trees), percolate includes fix when the two are fused.
+
+import time
+import json
+import cProfile
+import pstats
+import contextlib
+
+#============================================
+class Metrics() :
+  PROFILED=30
+  #----------------------------------------------------
+  def __init__(self,profiled=None) :
+    self.phases={}
+    self.counters={}
+    self.profiled=profiled
+    self.profile=None
+
+  #----------------------------------------------------
+  @contextlib.contextmanager
+  def phase(self,name) :
+    profiler=cProfile.Profile() if name == self.profiled else None
+    wall=time.perf_counter()
+    cpu=time.process_time()
+    if profiler :
+      profiler.enable()
+    try :
+      yield self
+    finally :
+      if profiler :
+        profiler.disable()
+        self.profile=getProfile(profiler)
+      self.add(name,time.perf_counter() - wall,time.process_time() - cpu)
+
+  #----------------------------------------------------
+  def add(self,name,wall,cpu=None) :
+    phase=self.phases.setdefault(name,{'wall' : 0.0})
+    phase['wall'] += wall
+    if cpu is not None :
+      phase['cpu']=phase.get('cpu',0.0) + cpu
+
+  #----------------------------------------------------
+  def getWall(self,name) :
+    return(self.phases.get(name,{}).get('wall',0.0))
+
+  #----------------------------------------------------
+  def count(self,name,n=1) :
+    self.counters[name]=self.counters.get(name,0) + n
+
+  #----------------------------------------------------
+  def set(self,name,value) :
+    self.counters[name]=value
+
+  #----------------------------------------------------
+  def toJson(self) :
+    metrics={'phases' : self.phases,'counters' : self.counters}
+    if self.profile is not None :
+      metrics['profile']={'phase' : self.profiled,'functions' : self.profile}
+    return(metrics)
+
+  #----------------------------------------------------
+  def write(self,sink) :
+    sink.write(json.dumps(self.toJson(),indent=1) + "\n")
+    sink.flush()
+
+#----------------------------------------------------
+def getProfile(profiler) :
+  # the functions taking the most time, callees included
+  stats=pstats.Stats(profiler)
+  functions=[]
+  for (fileName,line,function),(primitive,calls,tottime,cumtime,callers) in stats.stats.items() :
+    functions.append({
+      'function' : "{:s}:{:d}({:s})".format(fileName,line,function),
+      'calls' : calls,
+      'tottime' : tottime,
+      'cumtime' : cumtime,
+    })
+  functions.sort(key=lambda f : f['cumtime'],reverse=True)
+  return(functions[:Metrics.PROFILED])
@@ -0,0 +1,1558 @@
+import os
+import re
+import csv
+import time
+import logging
+import bisect
+import functools
+import itertools
+import contextlib
+from types import SimpleNamespace
+from array import array
+from datetime import date,datetime
+from .Trace import Trace
+from .Traversal import NONE,DOWN,UP,preOrder,postOrder,walk,subtreeSizes
+
+DATE_FORMAT="%Y-%m-%d"
+
+#============================================
+class PlanError(Exception) :
+  pass
+
+#----------------------------------------------------
+@functools.lru_cache(maxsize=None)
+def parseDate(text) :
+  # Dates are held as day ordinals, 0 when not set
+  if not text :
+    return(0)
+  try :
+    return(datetime.strptime(text,DATE_FORMAT).toordinal())
+  except ValueError :
+    raise ValueError("bad date <{:s}>, expected {:s}".format(text,DATE_FORMAT)) from None
+
+#----------------------------------------------------
+@functools.lru_cache(maxsize=None)
+def dateToStr(ordinal) :
+  return(date.fromordinal(ordinal).strftime(DATE_FORMAT) if ordinal else '')
+
+STATUS_CLASSES=("Neutral","Backlog","RunningHalf1","RunningHalf2","Done")
+
+# Schedule tags of a task, set by the Scheduler
+CRITICAL=1
+LATE=2
+BACKLOG_LATE=4
+BLOCKED=8
+UNSET=-(1 << 31)
+
+# Kinds of dependency : the task starts after the end or after the start
+# of the task it depends on
+FINISH_TO_START=0
+START_TO_START=1
+DEPENDENCY_KINDS={'fs' : FINISH_TO_START,'ss' : START_TO_START}
+DEPENDENCY=re.compile(r"(fs|ss)?([+-][0-9]+)?")
+AFTER_CACHE=1 << 16
+
+#----------------------------------------------------
+@functools.lru_cache(maxsize=AFTER_CACHE)
+def parseAfter(text) :
+  # Dependencies of a task, separated by spaces : id[:kind][+-lag], kind
+  # fs (default) or ss, lag in days. "A1 B2:ss+2 C:-1"
+  # Unlike the dates the texts are not bounded by the calendar : the cache
+  # keeps the latest ones, a resident server would grow it forever.
+  dependencies=[]
+  for item in text.split() :
+    taskId,sep,spec=item.partition(":")
+    m=DEPENDENCY.fullmatch(spec.lower())
+    if not taskId or m is None :
+      raise ValueError("bad dependency <{:s}>, expected id[:fs|ss][+-days]".format(item))
+    dependencies.append((taskId,DEPENDENCY_KINDS[m.group(1) or 'fs'],int(m.group(2) or 0)))
+  return(tuple(dependencies))
+
+#----------------------------------------------------
+def statusToStr(status) :
+  if status < 0 :
+    return("Neutral")
+  elif status < 1 :
+    return("Backlog")
+  elif status < 50 :
+    return("RunningHalf1")
+  elif status < 100 :
+    return("RunningHalf2")
+  else :
+    return("Done")
+
+#============================================
+class RowBase() :
+  __slots__=()
+  #----------------------------------------------------
+  def getStatusStr(self) :
+    return(statusToStr(self.getStatus()))
+  #----------------------------------------------------
+  def getStartStr(self) :
+    return(dateToStr(self.getStart()))
+  #----------------------------------------------------
+  def getEndStr(self) :
+    return(dateToStr(self.getEnd()))
+
+  #----------------------------------------------------
+  def toString(self) :
+    return("{:s} {:20s} {:1s} {:12s} {:10s} {:10s} {:20s} {:3d} {:s} ".format(
+      self.getDepth(),
+      self.getDesc(),
+      self.getDirection(),
+      self.getId(),
+      self.getStartStr(),
+      self.getEndStr(),
+      self.getWho(),
+      self.getStatus(),
+      self.getStatusStr(),
+    ))
+
+#============================================
+class RowView(RowBase) :
+  # Row-like view on task i of a tree, the texts are shared by all the views
+  __slots__=('tree','i')
+  #----------------------------------------------------
+  def __init__(self,tree,i) :
+    self.tree=tree
+    self.i=i
+  #----------------------------------------------------
+  def getDepth(self) :
+    return("*" * self.tree.depth[self.i])
+  #----------------------------------------------------
+  def getDesc(self) :
+    return(self.tree.strings.get(self.tree.desc[self.i]))
+  #----------------------------------------------------
+  def getWho(self) :
+    return(self.tree.strings.get(self.tree.who[self.i]))
+  #----------------------------------------------------
+  def getId(self) :
+    return(self.tree.strings.get(self.tree.id[self.i]))
+  #----------------------------------------------------
+  def getDirection(self) :
+    return(self.tree.strings.get(self.tree.direction[self.i]))
+  #----------------------------------------------------
+  def getAfter(self) :
+    return(self.tree.strings.get(self.tree.after[self.i]))
+  #----------------------------------------------------
+  def setDepth(self,depth) :
+    self.tree.depth[self.i]=len(depth)
+
+#============================================
+class Row(RowView) :
+  # start, end and status as given for the task
+  __slots__=()
+  #----------------------------------------------------
+  def getStart(self) :
+    return(self.tree.start[self.i])
+  #----------------------------------------------------
+  def getEnd(self) :
+    return(self.tree.end[self.i])
+  #----------------------------------------------------
+  def getStatus(self) :
+    return(self.tree.status[self.i])
+  #----------------------------------------------------
+  def setStart(self,start) :
+    self.tree.start[self.i]=start
+  #----------------------------------------------------
+  def setEnd(self,end) :
+    self.tree.end[self.i]=end
+  #----------------------------------------------------
+  def setStatus(self,status) :
+    self.tree.status[self.i]=status
+
+  #----------------------------------------------------
+  def getSlack(self) :
+    # days the end may slip without delaying the plan, UNSET if unknown
+    return(self.tree.slack[self.i])
+  #----------------------------------------------------
+  def getTags(self) :
+    return(self.tree.tags[self.i])
+  #----------------------------------------------------
+  def getStyle(self) :
+    # style class : lateness first, then the critical path unless done,
+    # then the status
+    tags=self.getTags()
+    if tags & BACKLOG_LATE :
+      return("backlogLate")
+    if tags & (LATE | BLOCKED) :
+      return("late")
+    if tags & CRITICAL and self.getStatus() < 100 :
+      return("critical")
+    return(self.getStatusStr())
+
+  #----------------------------------------------------
+  def toWbs(self,shift=0) :
+    # shift levels less, to draw a subtree
+    level=self.getDepth()[shift:] + self.getDirection()
+    status="{:3d}".format(self.getStatus()) if self.getStatus() >= 0 else ''
+    return("{:s} <b>{:s}</b>\\n{:s}\\n{:s}\\n{:s}%<<{:s}>>".format(
+      level,
+      self.getDesc(),
+      self.getStartStr(),
+      self.getEndStr(),
+      status,
+      self.getStyle(),
+      ))
+
+  #----------------------------------------------------
+  def toGantt(self) :
+    desc="[" + self.getDesc() + "]"
+    ganttLines=[]
+    if self.getStart() :
+      ganttLines.append(desc + " starts " + self.getStartStr())
+    if self.getEnd() :
+      ganttLines.append(desc + " ends " + self.getEndStr())
+    
+    return("\n".join(ganttLines))
+
+#============================================
+class UpRow(RowView) :
+  # start, end and status inherited top-down
+  __slots__=()
+  #----------------------------------------------------
+  def getStart(self) :
+    return(self.tree.upStart[self.i])
+  #----------------------------------------------------
+  def getEnd(self) :
+    return(self.tree.upEnd[self.i])
+  #----------------------------------------------------
+  def getStatus(self) :
+    return(self.tree.upStatus[self.i])
+  #----------------------------------------------------
+  def setStart(self,start) :
+    self.tree.upStart[self.i]=start
+  #----------------------------------------------------
+  def setEnd(self,end) :
+    self.tree.upEnd[self.i]=end
+  #----------------------------------------------------
+  def setStatus(self,status) :
+    self.tree.upStatus[self.i]=status
+
+#============================================
+class DownRow(RowView) :
+  # start, end and status rolled up bottom-up
+  __slots__=()
+  #----------------------------------------------------
+  def getStart(self) :
+    return(self.tree.downStart[self.i])
+  #----------------------------------------------------
+  def getEnd(self) :
+    return(self.tree.downEnd[self.i])
+  #----------------------------------------------------
+  def getStatus(self) :
+    return(self.tree.downStatus[self.i])
+  #----------------------------------------------------
+  def setStart(self,start) :
+    self.tree.downStart[self.i]=start
+  #----------------------------------------------------
+  def setEnd(self,end) :
+    self.tree.downEnd[self.i]=end
+  #----------------------------------------------------
+  def setStatus(self,status) :
+    self.tree.downStatus[self.i]=status
+
+#============================================
+class RolledUpRow(Row) :
+  # A task standing for its whole subtree in a view : drawn as a task, with
+  # the start and end rolled up from the subtree. Its status is the
+  # percolated one, which its subtree already forced.
+  __slots__=()
+  #----------------------------------------------------
+  def getStart(self) :
+    return(self.tree.downStart[self.i])
+  #----------------------------------------------------
+  def getEnd(self) :
+    return(self.tree.downEnd[self.i])
+
+#============================================
+class Node() :
+  # View on task i of a tree
+  __slots__=('tree','i')
+  #----------------------------------------------------
+  def __init__(self,tree,i) :
+    self.tree=tree
+    self.i=i
+
+  #----------------------------------------------------
+  def getIndex(self) :
+    return(self.i)
+  #----------------------------------------------------
+  def getChildren(self) :
+    return([Node(self.tree,c) for c in self.tree.getChildIndexes(self.i)])
+  #----------------------------------------------------
+  def getLevel(self) :
+    return(self.tree.level[self.i])
+  #----------------------------------------------------
+  def setLevel(self,level) :
+    self.tree.level[self.i]=level
+  #----------------------------------------------------
+  def getRow(self) :
+    return(Row(self.tree,self.i))
+  #----------------------------------------------------
+  def getUpRow(self) :
+    return(UpRow(self.tree,self.i))
+  #----------------------------------------------------
+  def getDownRow(self) :
+    return(DownRow(self.tree,self.i))
+  #----------------------------------------------------
+  def getRolledUpRow(self) :
+    return(RolledUpRow(self.tree,self.i))
+  #----------------------------------------------------
+  def getParent(self) :
+    parent=self.tree.parent[self.i]
+    return(None if parent == NONE else Node(self.tree,parent))
+
+  #----------------------------------------------------
+  def toString(self) :
+    return("{:d} row {:s}".format(
+      self.getLevel(),
+      self.getRow().toString(),
+    ))
+
+  #----------------------------------------------------
+  def toStringAll(self) :
+    return("Level {:d}\ndown : {:s}\nrow  : {:s}\nup   :{:s}".format(
+      self.getLevel(),
+      self.getDownRow().toString(),
+      self.getRow().toString(),
+      self.getUpRow().toString(),
+    ))
+
+
+  #----------------------------------------------------
+  def getDesc(self) :
+    return("<{:d}>-<{:s}>-<{:s}>".format(
+      self.getLevel(),
+      self.getRow().getId(),
+      self.getRow().getDesc(),
+    ))
+
+#============================================
+class StringTable() :
+  # Each distinct text is stored once and referenced by its index,
+  # index 0 is the empty string
+  __slots__=('strings','indexes')
+  #----------------------------------------------------
+  def __init__(self) :
+    self.strings=['']
+    self.indexes={'':0}
+  #----------------------------------------------------
+  def intern(self,s) :
+    i=self.indexes.get(s)
+    if i is None :
+      i=len(self.strings)
+      self.strings.append(s)
+      self.indexes[s]=i
+    return(i)
+  #----------------------------------------------------
+  def internAll(self,values) :
+    # indexes of a list of strings, the new ones added in order
+    indexes=self.indexes
+    strings=self.strings
+    new=[s for s in dict.fromkeys(values) if s not in indexes]
+    indexes.update(zip(new,range(len(strings),len(strings) + len(new))))
+    strings.extend(new)
+    return(array('i',map(indexes.__getitem__,values)))
+  #----------------------------------------------------
+  def get(self,i) :
+    return(self.strings[i])
+  #----------------------------------------------------
+  def load(self,strings) :
+    self.strings=list(strings)
+    self.indexes={s : i for i,s in enumerate(self.strings)}
+
+#============================================
+class Tree() :
+  # Columnar storage : task i is described by item i of each column array.
+  # Tasks are appended in document order so parents come before children.
+  links=('parent','firstChild','lastChild','nextSibling')
+  texts=('id','desc','who','direction','after')
+  values=(
+    'level','depth',
+    'givenStart','givenEnd','givenStatus',
+    'start','end','status',
+    'slack','tags',
+    'upStart','upEnd','upStatus',
+    'downStart','downEnd','downStatus',
+  )
+  columns=links + texts + values
+  #----------------------------------------------------
+  def __init__(self,rootLevel=0) :
+    self.rootLevel=rootLevel
+    self.strings=StringTable()
+    for column in Tree.columns :
+      setattr(self,column,array('i'))
+    # first task of each included file, in pre-order
+    self.includes=array('i')
+    self.treeBuilder=TreeBuilder(self)
+    self.taskIndex=None
+  #----------------------------------------------------
+  def getRoot(self) :
+    return(Node(self,0) if len(self.parent) else None)
+  #----------------------------------------------------
+  def getTaskIndex(self) :
+    # built on first use, dropped when tasks are added
+    if self.taskIndex is None :
+      self.taskIndex=TaskIndex(self)
+    return(self.taskIndex)
+  #----------------------------------------------------
+  def statusChanged(self) :
+    if self.taskIndex is not None :
+      self.taskIndex.statuses=None
+  #----------------------------------------------------
+  def getRootLevel(self) :
+    return(self.rootLevel)
+  #----------------------------------------------------
+  def getTreeBuilder(self) :
+    return(self.treeBuilder)
+  #----------------------------------------------------
+  def getSize(self) :
+    return(len(self.parent))
+  #----------------------------------------------------
+  def getNode(self,i) :
+    return(Node(self,i))
+  #----------------------------------------------------
+  def getChildIndexes(self,i) :
+    children=[]
+    c=self.firstChild[i]
+    while c != NONE :
+      children.append(c)
+      c=self.nextSibling[c]
+    return(children)
+
+  #----------------------------------------------------
+  def getDependencies(self,i) :
+    # (task,kind,lag) of each task i depends on
+    if not self.after[i] :
+      return(())
+    index=self.getTaskIndex()
+    dependencies=[]
+    for taskId,kind,lag in parseAfter(self.strings.get(self.after[i])) :
+      j=index.find(taskId,i)
+      if j is None :
+        raise PlanError("task <{:s}> depends on unknown task <{:s}>".format(self.strings.get(self.id[i]),taskId))
+      dependencies.append((j,kind,lag))
+    return(dependencies)
+
+  #----------------------------------------------------
+  def link(self,parent,i) :
+    self.parent[i]=parent
+    last=self.lastChild[parent]
+    if last == NONE :
+      self.firstChild[parent]=i
+    else :
+      self.nextSibling[last]=i
+    self.lastChild[parent]=i
+
+  #----------------------------------------------------
+  def addNode(self,parent,level,taskId,desc='',who='',start=0,end=0,status=0,direction='',after='') :
+    # a single task, dates as day ordinals : files are read by TreeBuilder
+    i=len(self.parent)
+    self.taskIndex=None
+    intern=self.strings.intern
+    for column in Tree.links :
+      getattr(self,column).append(NONE)
+    self.level.append(level)
+    self.depth.append(level + 1)
+    self.id.append(intern(taskId))
+    self.desc.append(intern(desc))
+    self.who.append(intern(who))
+    self.direction.append(intern(direction))
+    self.after.append(intern(after))
+    # given values are kept as read, row, up and down ones start from them
+    for column in (self.givenStart,self.start,self.upStart,self.downStart) :
+      column.append(start)
+    for column in (self.givenEnd,self.end,self.upEnd,self.downEnd) :
+      column.append(end)
+    for column in (self.givenStatus,self.status,self.upStatus,self.downStatus) :
+      column.append(status)
+    self.slack.append(UNSET)
+    self.tags.append(0)
+    if parent != NONE :
+      self.link(parent,i)
+    return(i)
+
+  #----------------------------------------------------
+  def graft(self,parent,subtree) :
+    # Append a copy of subtree below parent, its tasks stay contiguous
+    offset=len(self.parent)
+    self.taskIndex=None
+    for column in Tree.links :
+      getattr(self,column).extend(
+        NONE if j == NONE else j + offset for j in getattr(subtree,column)
+      )
+    strings=[self.strings.intern(s) for s in subtree.strings.strings]
+    for column in Tree.texts :
+      getattr(self,column).extend(strings[j] for j in getattr(subtree,column))
+    for column in Tree.values :
+      getattr(self,column).extend(getattr(subtree,column))
+    self.includes.append(offset)
+    self.includes.extend(j + offset for j in subtree.includes)
+    self.link(parent,offset)
+    self.adjustLevel(Node(self,offset))
+    return(offset)
+
+  #----------------------------------------------------
+  def copyRange(self,source,first,last,strings,moved) :
+    # Append tasks first..last-1 of source : moved holds the new index of
+    # the source tasks already copied and is extended with these ones,
+    # strings maps the source string indexes to this tree ones
+    offset=len(self.parent)
+    self.taskIndex=None
+    moved.extend(range(offset,offset + last - first))
+    for column in Tree.values :
+      getattr(self,column).extend(getattr(source,column)[first:last])
+    for column in Tree.texts :
+      getattr(self,column).extend(strings[j] for j in getattr(source,column)[first:last])
+    for column in Tree.links :
+      getattr(self,column).extend(array('i',[NONE]) * (last - first))
+    for k in range(first,last) :
+      if source.parent[k] != NONE :
+        self.link(moved[source.parent[k]],moved[k])
+
+  #----------------------------------------------------
+  def pack(self) :
+    # Compact picklable form : the string table, the column arrays and the
+    # included tasks
+    return((self.rootLevel,self.strings.strings,[getattr(self,c) for c in Tree.columns],self.includes))
+
+  #----------------------------------------------------
+  def adjustLevel(self,node) :
+    # parents are visited first so their level is already adjusted
+    level=self.level
+    for i in preOrder(self,node.getIndex()) :
+      level[i]=level[self.parent[i]] + 1
+      self.depth[i]=level[i] + 1
+
+  #----------------------------------------------------
+  def display(self,node) :
+    for i in preOrder(self,node.getIndex()) :
+      print(Node(self,i).toString())
+
+
+#============================================
+class TaskIndex() :
+  # Lookups over a tree : tasks by id (the first one when an id repeats,
+  # or the first one of the same included file), by owner and by status
+  # class, each list in pre-order. Tasks are stored
+  # in pre-order, so the Euler tour numbers of a task are its index when
+  # entering it and index+size-1 when leaving it : its subtree is that
+  # range and "i under j" is a comparison. Status classes are gathered on
+  # first use after a percolation, which changes them.
+
+  #----------------------------------------------------
+  def __init__(self,tree) :
+    self.tree=tree
+    self.size=subtreeSizes(tree)
+    self.ids={}
+    # every task of the repeated ids
+    self.repeats={}
+    self.owners={}
+    for i,k in enumerate(tree.id) :
+      j=self.ids.setdefault(k,i)
+      if j != i :
+        self.repeats.setdefault(k,array('i',[j])).append(i)
+    self.includes=set(tree.includes)
+    for i,k in enumerate(tree.who) :
+      self.owners.setdefault(k,array('i')).append(i)
+    self.statuses=None
+
+  #----------------------------------------------------
+  def find(self,taskId,near=NONE) :
+    # index of the task, None if there is none. Near a task, the id is
+    # looked for among the tasks of the file holding it, then of the files
+    # including that one, then in the whole plan.
+    k=self.tree.strings.indexes.get(taskId)
+    if k is None :
+      return(None)
+    tasks=self.repeats.get(k)
+    if tasks is not None and self.includes and near != NONE :
+      parent=self.tree.parent
+      scope=self.getFile(near)
+      while True :
+        for j in self.inSubtree(tasks,scope) :
+          if self.getFile(j) == scope :
+            return(j)
+        if parent[scope] == NONE :
+          break
+        scope=self.getFile(parent[scope])
+    return(self.ids.get(k))
+
+  #----------------------------------------------------
+  def getFile(self,i) :
+    # first task of the file task i was read from
+    parent=self.tree.parent
+    while i not in self.includes and parent[i] != NONE :
+      i=parent[i]
+    return(i)
+
+  #----------------------------------------------------
+  def getOwners(self) :
+    return(sorted(self.tree.strings.get(k) for k in self.owners))
+
+  #----------------------------------------------------
+  def getOwned(self,who) :
+    k=self.tree.strings.indexes.get(who)
+    return(self.owners.get(k,array('i')))
+
+  #----------------------------------------------------
+  def getStatus(self,statusStr) :
+    # tasks whose status class is statusStr (Backlog, Done ...)
+    if self.statuses is None :
+      self.statuses={}
+      for i,status in enumerate(self.tree.status) :
+        self.statuses.setdefault(statusToStr(status),array('i')).append(i)
+    return(self.statuses.get(statusStr,array('i')))
+
+  #----------------------------------------------------
+  def getExit(self,i) :
+    return(i + self.size[i] - 1)
+
+  #----------------------------------------------------
+  def isUnder(self,i,j) :
+    # i in the subtree of j, j included
+    return(j <= i < j + self.size[j])
+
+  #----------------------------------------------------
+  def getSubtree(self,j) :
+    return(range(j,j + self.size[j]))
+
+  #----------------------------------------------------
+  def inSubtree(self,tasks,j) :
+    # the tasks of a pre-ordered list which are in the subtree of j
+    return(tasks[bisect.bisect_left(tasks,j):bisect.bisect_left(tasks,j + self.size[j])])
+
+#============================================
+class TreeBuilder() :
+
+  #----------------------------------------------------
+  def __init__(self,tree) :
+    self.tree=tree
+    self.current=NONE
+
+  #----------------------------------------------------
+  def climb(self,upCount) :
+    i=ancestor(self.tree.parent,self.current,upCount + 1)
+    if i == NONE :
+      raise ValueError("task is above the root of the tree")
+    self.current=i
+    return(i)
+
+  #----------------------------------------------------
+  def addSubtree(self,depth,subtree) :
+      upCount=self.tree.level[self.current] - (len(depth) -1)
+      if logging.getLogger().isEnabledFor(logging.DEBUG) :
+        logging.debug("addSubtree row depth {:s} node level {:d} upCount {:d} ".format(
+         depth,
+         self.tree.level[self.current],
+         upCount
+        ))
+      parent=self.climb(upCount)
+      if subtree.getSize() :
+        self.tree.graft(parent,subtree)
+
+  #----------------------------------------------------
+  def addRows(self,rows,first,last,errors) :
+    # Append rows first..last-1 of a Rows as tasks : each is linked to its
+    # parent in turn, the other columns are extended at once. A task above
+    # the root goes in errors and under the root, the tree is not used.
+    t=self.tree
+    n=last - first
+    offset=t.getSize()
+    t.taskIndex=None
+    parent=t.parent
+    level=t.level
+    firstChild=t.firstChild
+    lastChild=t.lastChild
+    nextSibling=t.nextSibling
+    for column in (firstChild,lastChild,nextSibling) :
+      column.extend(array('i',[NONE]) * n)
+    depth=rows.depth
+    current=self.current
+    for k in range(first,last) :
+      i=offset + k - first
+      if current == NONE :
+        # Create the root !
+        parent.append(NONE)
+        level.append(t.getRootLevel())
+        current=i
+        continue
+      l=depth[k] - 1
+      p=ancestor(parent,current,level[current] - l + 1)
+      if p == NONE :
+        errors.append((rows.line[k],"task is above the root of the tree"))
+        p=0
+      parent.append(p)
+      level.append(l)
+      c=lastChild[p]
+      if c == NONE :
+        firstChild[p]=i
+      else :
+        nextSibling[c]=i
+      lastChild[p]=i
+      current=i
+    self.current=current
+    t.depth.extend(depth[first:last])
+    for column in Tree.texts :
+      getattr(t,column).extend(getattr(rows,column)[first:last])
+    for columns,values in (
+      ((t.givenStart,t.start,t.upStart,t.downStart),rows.start),
+      ((t.givenEnd,t.end,t.upEnd,t.downEnd),rows.end),
+      ((t.givenStatus,t.status,t.upStatus,t.downStatus),rows.status),
+    ) :
+      for column in columns :
+        column.extend(values[first:last])
+    t.slack.extend(array('i',[UNSET]) * n)
+    t.tags.extend(array('i',[0]) * n)
+
+#----------------------------------------------------
+def ancestor(parent,i,count) :
+  # count-th ancestor of i, NONE above the root. Walking up from the last
+  # task costs the depth change, so a whole file is built in a single
+  # linear pass.
+  for k in range(count) :
+    if i == NONE :
+      break
+    i=parent[i]
+  return(i)
+
+#============================================
+class Rows() :
+  # A chunk of csv rows parsed into columns : depth (number of stars), the
+  # texts as string indexes of the tree, dates as ordinals, and the line
+  # of each row. includes holds (row,depth,file,line) of the include rows,
+  # row being the number of rows before them.
+  __slots__=('depth','id','desc','who','direction','after','start','end','status','line','includes')
+  #----------------------------------------------------
+  def __init__(self) :
+    for column in Rows.__slots__ :
+      setattr(self,column,array('i'))
+    self.includes=[]
+
+  #----------------------------------------------------
+  def __len__(self) :
+    return(len(self.depth))
+
+  #----------------------------------------------------
+  def fill(self,kept,strings) :
+    # Append the rows of kept, lists of at least FIELDS fields, a column
+    # at a time. Values are all checked before anything is appended : on a
+    # ValueError the columns are left as they were.
+    if not kept :
+      return
+    depth,taskId,desc,start,end,who,status,after=itertools.islice(zip(*kept),FIELDS)
+    depth=list(map(str.strip,depth))
+    start=array('i',map(parseDate,map(str.strip,start)))
+    end=array('i',map(parseDate,map(str.strip,end)))
+    status=array('i',[int(s) if s else 0 for s in status])
+    after=list(map(str.strip,after))
+    for text in set(after) :
+      parseAfter(text)
+    self.depth.extend([len(d) if d.endswith("*") else len(d) - 1 for d in depth])
+    self.direction.extend(strings.internAll(['' if d.endswith("*") else d[-1:] for d in depth]))
+    self.id.extend(strings.internAll(list(map(str.strip,taskId))))
+    self.desc.extend(strings.internAll(list(map(str.strip,desc))))
+    self.who.extend(strings.internAll(list(map(str.strip,who))))
+    self.after.extend(strings.internAll(after))
+    self.start.extend(start)
+    self.end.extend(end)
+    self.status.extend(status)
+
+#============================================
+class Percolator() :
+  # The rules work on task indexes and the tree columns, parentToChildAll,
+  # childToParentAll and setFinal* apply the same rules to Node views
+
+  #----------------------------------------------------
+  def __init__(self,args,tree) :
+    self.args=args
+    self.tree=tree
+    self.trace=Trace("percolate")
+    self.fixTrace=Trace("fix")
+    self.traced=self.trace.isOn()
+    self.noted=self.trace.isOn(logging.INFO)
+    self.fixTraced=self.fixTrace.isOn()
+    # with metrics, the rules count their calls and the dru cases : they
+    # look at it where they look at the traces, at no cost otherwise
+    self.metrics=getattr(args,'metrics',None)
+    self.metered=self.metrics is not None
+    self.observed=self.traced or self.metered
+    self.fixObserved=self.fixTraced or self.metered
+    self.parentToChildCalls=0
+    self.childToParentCalls=0
+    self.druStart=[0] * 8
+    self.druEnd=[0] * 8
+    self.fixTime=0.0
+    self.trace.info("----------------------------------- Percolation begins-----------------------------------------")
+    if args.fix :
+      self.fixTrace.info("----------------------------------- FIX  begins ---------------------------------------------")
+      self.percolateAndFix(tree.getRoot())
+      self.fixTrace.info("----------------------------------- FIX  over   ---------------------------------------------")
+    else :
+      self.percolate(tree.getRoot())
+    tree.statusChanged()
+    if self.metered :
+      self.metrics.count('parentToChild',self.parentToChildCalls)
+      self.metrics.count('childToParent',self.childToParentCalls)
+      self.metrics.set('druStart',self.druStart)
+      self.metrics.set('druEnd',self.druEnd)
+      if args.fix :
+        self.metrics.add('fix',self.fixTime)
+    self.trace.info("----------------------------------- Percolation Over  -----------------------------------------")
+    if args.dump :
+      self.display(tree.getRoot())
+      self.displayAll(tree.getRoot())
+
+  #----------------------------------------------------
+  def parentToChildAll(self,parent,child) :
+    self.parentToChild(parent.getIndex(),child.getIndex())
+
+  #----------------------------------------------------
+  def parentToChild(self,p,c) :
+    # The child values are read from the given columns : when a child is
+    # entered they are still its up and row values, and reading them makes
+    # the rule safe to replay on a percolated tree (see update)
+    t=self.tree
+    if self.observed :
+      self.parentToChildCalls += 1
+      self.trace.debug("parentToChildAll() in parent %s",t.getNode(p).toStringAll)
+      self.trace.debug("parentToChildAll() in  child %s",t.getNode(c).toStringAll)
+
+    if not t.givenStart[c] :
+      if self.noted :
+        self.trace.info("%s start not set",t.getNode(c).getDesc)
+      t.upStart[c]=t.upStart[p]
+    else :
+      t.upStart[c]=t.givenStart[c]
+    if not t.givenEnd[c] :
+      if self.noted :
+        self.trace.info("%s end not set",t.getNode(c).getDesc)
+      t.upEnd[c]=t.upEnd[p]
+    else :
+      t.upEnd[c]=t.givenEnd[c]
+    if not t.givenStatus[c] :
+      if self.noted :
+        self.trace.info("%s status not set",t.getNode(c).getDesc)
+      t.upStatus[c]=t.upStatus[p]
+    else : 
+      t.upStatus[c]=t.givenStatus[c]
+      if ((t.givenStatus[c] >= 0) and (t.givenStatus[c] < 100))  and   t.status[p] >= 100 :
+        if self.noted :
+          self.trace.info("Parent status cannot be 100% as child is not, forcing it to child' value")
+        t.status[p]=t.givenStatus[c]
+    if self.traced :
+      self.trace.debug("parentToChildAll() child out %s",t.getNode(c).toStringAll)
+
+
+  #----------------------------------------------------
+  def childToParentAll(self,parent,child) :
+    self.childToParent(parent.getIndex(),child.getIndex())
+
+  #----------------------------------------------------
+  def childToParent(self,p,c) :
+    t=self.tree
+    if self.observed :
+      self.childToParentCalls += 1
+      self.trace.debug("childToParentAll() in parent %s",t.getNode(p).toStringAll)
+      self.trace.debug("childToParentAll() in  child %s",t.getNode(c).toStringAll)
+
+    if not t.downStart[p] :
+      if self.noted :
+        self.trace.info("%s start not set",t.getNode(p).getDesc)
+      t.downStart[p]=t.downStart[c]
+    else : 
+      if t.downStart[c] and t.downStart[c] < t.downStart[p] :
+        t.downStart[p]=t.downStart[c]
+
+    if not t.downEnd[p] :
+      if self.noted :
+        self.trace.info("%s end not set",t.getNode(p).getDesc)
+      t.downEnd[p]=t.upEnd[c]
+    else : 
+      if t.downEnd[c] > t.downEnd[p] :
+        t.downEnd[p]=t.downEnd[c]
+
+    if not t.downStatus[p] :
+      if self.noted :
+        self.trace.info("%s status not set",t.getNode(p).getDesc)
+      t.downStatus[p]=t.downStatus[c]
+    else :
+      if ((t.status[c] >= 0) and (t.status[c] < 100))  and   t.status[p] == 0 :
+        if self.noted :
+          self.trace.info("Parent status cannot be 0% as child is not, forcing it to child' value")
+        t.status[p]=t.status[c]
+
+    if self.traced :
+      self.trace.debug("childToParentAll() parent out %s",t.getNode(p).toStringAll)
+
+
+  #----------------------------------------------------
+  def display(self,node) :
+    self.tree.display(node)
+
+  #----------------------------------------------------
+  def displayAll(self,node) :
+    for i in preOrder(self.tree,node.getIndex()) :
+      print(Node(self.tree,i).toStringAll())
+
+
+  #----------------------------------------------------
+  def percolate(self,node) :
+    # values go down to a child when entering it, and back up to its
+    # parent once the child subtree is done
+    root=node.getIndex()
+    parent=self.tree.parent
+    for event,i in walk(self.tree,root) :
+      if event == DOWN :
+        if i != root :
+          self.parentToChild(parent[i],i)
+        if self.traced :
+          self.trace.debug("percolate() node at entry %s",self.tree.getNode(i).toString)
+      else :
+        if self.traced :
+          self.trace.debug("percolate() node at end %s",self.tree.getNode(i).toString)
+        if i != root :
+          self.childToParent(parent[i],i)
+
+  #----------------------------------------------------
+  def percolateAndFix(self,node) :
+    # percolate and fix in a single walk : once the subtree of a task is
+    # done its down values are final, so its final row is set right away,
+    # before it is rolled up into its parent (which does not read the row
+    # start and end of the child)
+    root=node.getIndex()
+    parent=self.tree.parent
+    for event,i in walk(self.tree,root) :
+      if event == DOWN :
+        if i != root :
+          self.parentToChild(parent[i],i)
+        if self.traced :
+          self.trace.debug("percolate() node at entry %s",self.tree.getNode(i).toString)
+      else :
+        if self.observed :
+          self.trace.debug("percolate() node at end %s",self.tree.getNode(i).toString)
+          if self.metered :
+            t0=time.perf_counter()
+            self.finalRow(i)
+            self.fixTime += time.perf_counter() - t0
+          else :
+            self.finalRow(i)
+        else :
+          self.finalRow(i)
+        if i != root :
+          self.childToParent(parent[i],i)
+
+  #----------------------------------------------------
+  def setFinalStart(self,node) :
+    self.finalStart(node.getIndex())
+
+  #----------------------------------------------------
+  def finalStart(self,i) :
+    t=self.tree
+    dru=0
+    dru += 0 if not t.downStart[i] else 4 
+    dru += 0 if not t.start[i] else 2 
+    dru += 0 if not t.upStart[i] else 1
+    if self.fixObserved :
+      self.druStart[dru] += 1
+      self.fixTrace.debug(" node %s  dru %d",t.getNode(i).toStringAll,dru)
+    if dru==0 :
+      pass
+    elif dru==1 :
+      t.start[i]=t.upStart[i]
+    elif dru==2 :
+      pass
+    elif dru==3 :
+      pass
+    elif dru==4 :
+      t.start[i]=t.downStart[i]
+    elif dru==5 :
+      t.start[i]=t.downStart[i]
+    elif dru==6 :
+      if t.downStart[i] < t.start[i] :
+        t.start[i]=t.downStart[i]
+    elif dru==7 :
+      if t.downStart[i] < t.start[i] :
+        t.start[i]=t.downStart[i]
+    if self.fixTraced :
+      self.fixTrace.debug(" node %s  dru %d",t.getNode(i).toStringAll,dru)
+ 
+  #----------------------------------------------------
+  def setFinalEnd(self,node) :
+    self.finalEnd(node.getIndex())
+
+  #----------------------------------------------------
+  def finalEnd(self,i) :
+    t=self.tree
+    dru=0
+    dru += 0 if not t.downEnd[i] else 4
+    dru += 0 if not t.end[i] else 2
+    dru += 0 if not t.upEnd[i] else 1
+    if self.fixObserved :
+      self.druEnd[dru] += 1
+      self.fixTrace.debug(" node %s  dru %d",t.getNode(i).toStringAll,dru)
+    if dru==0 :
+      pass
+    elif dru==1 :
+      t.end[i]=t.upEnd[i]
+    elif dru==2 :
+      pass
+    elif dru==3 :
+      pass
+    elif dru==4 :
+      t.end[i]=t.downEnd[i]
+    elif dru==5 :
+      t.end[i]=t.downEnd[i]
+    elif dru==6 :
+      if t.downEnd[i] > t.end[i] :
+        t.end[i]=t.downEnd[i]
+    elif dru==7 :
+      if t.downEnd[i] > t.end[i] :
+        t.end[i]=t.downEnd[i]
+    if self.fixTraced :
+      self.fixTrace.debug(" node %s  dru %d",t.getNode(i).toStringAll,dru)
+
+  #----------------------------------------------------
+  def setFinalRow(self,node) :
+    self.finalRow(node.getIndex())
+
+  #----------------------------------------------------
+  def finalRow(self,i) :
+    self.finalStart(i)
+    self.finalEnd(i)
+
+  #----------------------------------------------------
+  def update(self,node,start=None,end=None,status=None) :
+    # Change what a task was given (dates as day ordinals, 0 to unset) and
+    # replay the rules only where it matters : the task, the descendants
+    # whose inherited values change, then its ancestors up to the first one
+    # left unchanged. An ancestor takes the new dates of its child alone
+    # when that is enough (see widen), and reads all its children again
+    # otherwise.
+    # Returns the nodes whose diagram output changed : those whose row
+    # start, end or status changed, and the children of those whose row
+    # start changed, which Gantt draws from their parent's start.
+    t=self.tree
+    x=node.getIndex()
+    if start is not None :
+      t.givenStart[x]=start
+    if end is not None :
+      t.givenEnd[x]=end
+    if status is not None :
+      t.givenStatus[x]=status
+    before={}
+    firstChild=t.firstChild
+    nextSibling=t.nextSibling
+    parent=t.parent
+    old=(t.downStart[x],t.downEnd[x],t.downStatus[x],t.status[x])
+    # the subtree of x, pruned below the tasks whose up values do not move
+    i=x
+    while True :
+      redone=self.reenter(i,x,before)
+      c=firstChild[i] if redone else NONE
+      if c != NONE :
+        i=c
+        continue
+      while True :
+        if redone and self.args.fix :
+          self.finalRow(i)
+        if i == x :
+          break
+        self.childToParent(parent[i],i)
+        redone=True
+        s=nextSibling[i]
+        if s != NONE :
+          i=s
+          break
+        i=parent[i]
+      if i == x :
+        break
+    # the ancestors of x
+    i=x
+    while parent[i] != NONE :
+      a=parent[i]
+      rolled=(t.downStart[a],t.downEnd[a],t.downStatus[a],t.status[a])
+      if (i == x and status is not None) or not self.widen(a,i,old,before) :
+        self.reset(a,before)
+        c=firstChild[a]
+        while c != NONE :
+          self.parentToChild(a,c)
+          self.childToParent(a,c)
+          c=nextSibling[c]
+      if self.args.fix :
+        self.finalRow(a)
+      if rolled == (t.downStart[a],t.downEnd[a],t.downStatus[a],t.status[a]) :
+        break
+      i=a
+      old=rolled
+    t.statusChanged()
+    changed=set()
+    for i,row in before.items() :
+      if row != (t.start[i],t.end[i],t.status[i]) :
+        changed.add(i)
+        if row[0] != t.start[i] :
+          changed.update(t.getChildIndexes(i))
+    return([t.getNode(i) for i in sorted(changed)])
+
+  #----------------------------------------------------
+  def widen(self,a,i,old,before) :
+    # Fold the new dates of child i alone into its parent a, old being the
+    # down values and status i had : True when that gives what folding all
+    # the children again would. The status of i must be unchanged, and its
+    # old dates must not have been the parent's start or end unless the new
+    # ones only move them further out. An unset end is taken from the up
+    # end of the first child, which then must be another one.
+    t=self.tree
+    start,end,downStatus,status=old
+    if (t.downStatus[i],t.status[i]) != (downStatus,status) :
+      return(False)
+    if not t.givenEnd[a] and (t.firstChild[a] == i or not t.upEnd[t.firstChild[a]]) :
+      return(False)
+    s=t.downStart[i]
+    e=t.downEnd[i]
+    if start and start <= t.downStart[a] and not (s and s <= start) :
+      return(False)
+    if end >= t.downEnd[a] and e < end :
+      return(False)
+    before.setdefault(a,(t.start[a],t.end[a],t.status[a]))
+    if s and (not t.downStart[a] or s < t.downStart[a]) :
+      t.downStart[a]=s
+    if e > t.downEnd[a] :
+      t.downEnd[a]=e
+    t.start[a]=t.givenStart[a]
+    t.end[a]=t.givenEnd[a]
+    return(True)
+
+  #----------------------------------------------------
+  def reenter(self,i,x,before) :
+    # inherit into i again, True when i has to be recomputed
+    t=self.tree
+    up=(t.upStart[i],t.upEnd[i],t.upStatus[i])
+    p=t.parent[i]
+    if p != NONE :
+      # the rule may force the parent status, keep what it was
+      before.setdefault(p,(t.start[p],t.end[p],t.status[p]))
+      self.parentToChild(p,i)
+    else :
+      t.upStart[i]=t.givenStart[i]
+      t.upEnd[i]=t.givenEnd[i]
+      t.upStatus[i]=t.givenStatus[i]
+    if i != x and up == (t.upStart[i],t.upEnd[i],t.upStatus[i]) :
+      return(False)
+    self.reset(i,before)
+    return(True)
+
+  #----------------------------------------------------
+  def reset(self,i,before) :
+    # back to the given values before the children are folded in again
+    t=self.tree
+    before.setdefault(i,(t.start[i],t.end[i],t.status[i]))
+    t.downStart[i]=t.givenStart[i]
+    t.downEnd[i]=t.givenEnd[i]
+    t.downStatus[i]=t.givenStatus[i]
+    t.status[i]=t.givenStatus[i]
+    t.start[i]=t.givenStart[i]
+    t.end[i]=t.givenEnd[i]
+
+  #----------------------------------------------------
+  def fix(self,node) :
+    # children are fixed before their parent
+    for event,i in walk(self.tree,node.getIndex()) :
+      if event == DOWN :
+        if self.fixTraced :
+          self.fixTrace.debug(" Entering fix for node %s",self.tree.getNode(i).toStringAll)
+      else :
+        self.finalRow(i)
+        if self.fixTraced :
+          self.fixTrace.debug(" Leaving  fix for node %s",self.tree.getNode(i).toStringAll)
+
+#============================================
+class IncludeCache() :
+  # Trees of the included files, keyed by resolved path : a file is parsed
+  # once however often it is included, each include grafts a copy. A tree
+  # is kept with the modification times of every file it was built from,
+  # its nested includes too, and is rebuilt when one of them changed : a
+  # cache may outlive a build. The files being built are stacked to catch
+  # include cycles.
+
+  #----------------------------------------------------
+  def __init__(self,metrics=None) :
+    self.metrics=metrics
+    self.trees={}
+    self.building=[]
+    # files read by the trees being built, innermost last
+    self.reading=[]
+    self.used=set()
+
+  #----------------------------------------------------
+  def enter(self,csvFile) :
+    path=os.path.realpath(csvFile)
+    if path in self.building :
+      cycle=self.building[self.building.index(path):] + [path]
+      raise ValueError("include cycle " + " -> ".join(cycle))
+    self.building.append(path)
+
+  #----------------------------------------------------
+  def leave(self) :
+    self.building.pop()
+
+  #----------------------------------------------------
+  def getTree(self,csvFile) :
+    path=os.path.realpath(csvFile)
+    cached=self.trees.get(path)
+    if cached is not None and unchanged(cached[1]) :
+      Trace("build").debug("include %s from cache",path)
+    else :
+      mtime=os.stat(path).st_mtime_ns
+      tree=Tree()
+      if self.metrics :
+        self.metrics.count('files')
+      self.reading.append({(path,mtime)})
+      try :
+        build(path,tree,self)
+      finally :
+        files=self.reading.pop()
+      cached=(tree,frozenset(files))
+      self.trees[path]=cached
+    if self.reading :
+      self.reading[-1].update(cached[1])
+    self.used.add(path)
+    return(cached[0])
+
+  #----------------------------------------------------
+  def sweep(self) :
+    # forget the files not included since the previous sweep
+    for path in set(self.trees) - self.used :
+      del self.trees[path]
+    self.used=set()
+
+#----------------------------------------------------
+def unchanged(files) :
+  try :
+    return(all(os.stat(path).st_mtime_ns == mtime for path,mtime in files))
+  except OSError :
+    return(False)
+
+#============================================
+class IncludeStubs() :
+  # Includes as seen by a parallel worker : each one is grafted as a single
+  # placeholder task and recorded, the included file is parsed on its own
+  # and takes the place of the placeholder when the plan is assembled
+
+  #----------------------------------------------------
+  def __init__(self,tree) :
+    self.tree=tree
+    self.placeholders=[]
+
+  #----------------------------------------------------
+  def enter(self,csvFile) :
+    pass
+
+  #----------------------------------------------------
+  def leave(self) :
+    pass
+
+  #----------------------------------------------------
+  def getTree(self,csvFile) :
+    path=os.path.realpath(csvFile)
+    stub=Tree()
+    stub.addNode(NONE,0,'!' + path)
+    # grafted right after the builder climbs, at the end of the tree
+    self.placeholders.append((self.tree.getSize(),path))
+    return(stub)
+
+#----------------------------------------------------
+def unpack(packed) :
+  rootLevel,strings,columns,includes=packed
+  tree=Tree(rootLevel)
+  tree.strings.load(strings)
+  for column,values in zip(Tree.columns,columns) :
+    setattr(tree,column,values)
+  tree.includes=includes
+  return(tree)
+
+#----------------------------------------------------
+def scanIncludes(csvFile) :
+  # (line,resolved path) of the includes of a file, in document order
+  includes=[]
+  with open(csvFile) as csvfile:
+    reader=csv.reader(csvfile, delimiter=',', quotechar='"')
+    for row in reader :
+      if len(row) > 1 and row[0].startswith("*") and row[1].startswith("!") :
+        fileName=os.path.join(os.path.dirname(csvFile),row[1].strip()[1:].rstrip())
+        includes.append((reader.line_num,os.path.realpath(fileName)))
+  return(includes)
+
+#----------------------------------------------------
+def includeOrder(csvFile) :
+  # Every file reachable from csvFile, each included file before the files
+  # including it, csvFile last. Stops on include cycles and missing files.
+  root=os.path.realpath(csvFile)
+  order=[]
+  done=set()
+  building=[root]
+  stack=[(root,iter(scanIncludes(root)))]
+  while stack :
+    path,includes=stack[-1]
+    for line,include in includes :
+      if include in building :
+        cycle=building[building.index(include):] + [include]
+        raise PlanError("{:s}:{:d}: include cycle {:s}".format(path,line," -> ".join(cycle)))
+      if include not in done :
+        try :
+          stack.append((include,iter(scanIncludes(include))))
+        except OSError as e :
+          raise PlanError("{:s}:{:d}: {:s}".format(path,line,str(e)))
+        building.append(include)
+        break
+    else :
+      stack.pop()
+      building.pop()
+      done.add(path)
+      order.append(path)
+  return(order)
+
+#----------------------------------------------------
+def parseFile(csvFile) :
+  # Worker side of buildParallel
+  tree=Tree()
+  stubs=IncludeStubs(tree)
+  build(csvFile,tree,stubs)
+  return((tree.pack(),stubs.placeholders))
+
+#----------------------------------------------------
+def assemble(tree,source,placeholders,trees) :
+  # Copy source into tree, grafting the included trees in place of their
+  # placeholders : the tasks end up in document order, as with build()
+  strings=[tree.strings.intern(s) for s in source.strings.strings]
+  moved=array('i')
+  first=0
+  for j,path in placeholders :
+    tree.copyRange(source,first,j,strings,moved)
+    moved.append(tree.graft(moved[source.parent[j]],trees[path]))
+    first=j + 1
+  tree.copyRange(source,first,source.getSize(),strings,moved)
+
+#----------------------------------------------------
+def buildParallel(csvFile,tree,jobs) :
+  # Same tree as build(), the files of the include graph being parsed
+  # by a pool of jobs processes
+  order=includeOrder(csvFile)
+  Trace("build").info("%d files parsed by %d processes",len(order),jobs)
+  import concurrent.futures
+  with concurrent.futures.ProcessPoolExecutor(jobs) as pool :
+    parsed=dict(zip(order,pool.map(parseFile,order)))
+  trees={}
+  for path in order :
+    packed,placeholders=parsed.pop(path)
+    trees[path]=tree if path == order[-1] else Tree()
+    assemble(trees[path],unpack(packed),placeholders,trees)
+
+#----------------------------------------------------
+def build(csvFile,tree,includes=None) :
+  # Included files are relative to the file including them
+  # The file is read by chunks of CHUNK rows, each parsed into columns
+  # (Rows) then appended to the tree, the included trees being grafted in
+  # between. Malformed rows are skipped and reported together once the
+  # whole file is read. With metrics, the time spent appending tasks and
+  # grafting included trees is measured apart : the rest is parsing.
+  includes=includes if includes is not None else IncludeCache()
+  metrics=getattr(includes,'metrics',None)
+  Trace("build").info("csvFile  %s",csvFile)
+  treeBuilder=tree.getTreeBuilder()
+  errors=[]
+  includes.enter(csvFile)
+  try :
+    with open(csvFile) as csvfile:
+      reader=csv.reader(csvfile, delimiter=',', quotechar='"')
+      more=True
+      while more :
+        rows,more=parseRows(reader,tree.strings,errors)
+        t0=time.perf_counter() if metrics else 0
+        aside=0
+        first=0
+        for k,depth,taskId,line in rows.includes :
+          treeBuilder.addRows(rows,first,k,errors)
+          first=k
+          fileName=os.path.join(os.path.dirname(csvFile),taskId[1:].rstrip())
+          try :
+            if metrics :
+              metrics.count('includes')
+              t1=time.perf_counter()
+              subtree=includes.getTree(fileName)
+              t2=time.perf_counter()
+              treeBuilder.addSubtree(depth,subtree)
+              t3=time.perf_counter()
+              metrics.add('includes',t3 - t2)
+              aside += t3 - t1
+            else :
+              treeBuilder.addSubtree(depth,includes.getTree(fileName))
+          except PlanError as e :
+            errors.append((line,e))
+          except (ValueError,OSError) as e :
+            errors.append((line,str(e)))
+        treeBuilder.addRows(rows,first,len(rows),errors)
+        if metrics :
+          metrics.add('construct',time.perf_counter() - t0 - aside)
+      if metrics :
+        metrics.count('rows',reader.line_num)
+  finally :
+    includes.leave()
+  if errors :
+    raise PlanError(errorReport(csvFile,errors))
+
+#----------------------------------------------------
+CHUNK=1 << 14
+FIELDS=8
+MAX_ERRORS=20
+
+#----------------------------------------------------
+def parseRows(reader,strings,errors) :
+  # Rows of the next CHUNK lines of a csv reader, and whether there may
+  # be more : depth,id,desc,start,end,who,status,after by position, missing
+  # trailing fields being empty and lines not starting with * ignored. Bad
+  # rows go to errors as (line,message).
+  rows=Rows()
+  read=0
+  kept=[]
+  lines=[]
+  padding=[''] * FIELDS
+  for fields in itertools.islice(reader,CHUNK) :
+    read += 1
+    if not fields or not fields[0].startswith("*") :
+      continue
+    if len(fields) < FIELDS :
+      fields += padding[len(fields):]
+    if fields[1].startswith("!") :
+      depth=fields[0].strip()
+      rows.includes.append((len(kept),depth if depth.endswith("*") else depth[:-1],fields[1].strip(),reader.line_num))
+      continue
+    kept.append(fields)
+    lines.append(reader.line_num)
+  try :
+    rows.fill(kept,strings)
+  except ValueError :
+    # the rows are checked one by one, the bad ones left out
+    good=[]
+    goodLines=[]
+    dropped=[]
+    for k,(fields,line) in enumerate(zip(kept,lines)) :
+      try :
+        Rows().fill([fields],strings)
+        good.append(fields)
+        goodLines.append(line)
+      except ValueError as e :
+        errors.append((line,str(e)))
+        dropped.append(k)
+    rows.includes=[(k - bisect.bisect_left(dropped,k),depth,taskId,line) for k,depth,taskId,line in rows.includes]
+    kept=good
+    lines=goodLines
+    rows.fill(kept,strings)
+  rows.line.extend(lines)
+  return(rows,read == CHUNK)
+
+#----------------------------------------------------
+def errorReport(csvFile,errors) :
+  # one line per error, in file order, those of the included files as they
+  # were reported
+  report=[]
+  for line,error in sorted(errors,key=lambda e : e[0])[:MAX_ERRORS] :
+    report.append(str(error) if isinstance(error,PlanError) else "{:s}:{:d}: {:s}".format(csvFile,line,error))
+  if len(errors) > MAX_ERRORS :
+    report.append("{:s}: {:d} more errors".format(csvFile,len(errors) - MAX_ERRORS))
+  return("\n".join(report))
+
+#----------------------------------------------------
+def resolveDependencies(csvFile,tree) :
+  # Check the ids in the after column of a whole plan once it is built :
+  # tasks may depend on tasks of other files, so this is done on the plan
+  # rather than on each file. The rows depending on unknown tasks are then
+  # looked for in the files to report where they are.
+  index=tree.getTaskIndex()
+  strings=tree.strings
+  unknown={}
+  for k in set(tree.after) :
+    if k :
+      missing=[taskId for taskId,kind,lag in parseAfter(strings.get(k)) if index.find(taskId) is None]
+      if missing :
+        unknown[strings.get(k)]=missing
+  if not unknown :
+    return
+  errors=[]
+  found=set()
+  for path in includeOrder(csvFile) :
+    with open(path) as csvfile :
+      reader=csv.reader(csvfile, delimiter=',', quotechar='"')
+      for fields in reader :
+        if len(fields) >= FIELDS and fields[0].startswith("*") and fields[7].strip() in unknown :
+          after=fields[7].strip()
+          found.add(after)
+          for taskId in unknown[after] :
+            errors.append((reader.line_num,PlanError("{:s}:{:d}: task <{:s}> depends on unknown task <{:s}>".format(path,reader.line_num,fields[1].strip(),taskId))))
+  for after in set(unknown) - found :
+    errors.append((0,PlanError("{:s}: depends on unknown task <{:s}>".format(csvFile,unknown[after][0]))))
+  raise PlanError(errorReport(csvFile,errors))
+
+#============================================
+class NoMetrics() :
+  # Metrics doing nothing, false so that the measures are skipped
+  #----------------------------------------------------
+  def __bool__(self) :
+    return(False)
+  #----------------------------------------------------
+  def phase(self,name) :
+    return(contextlib.nullcontext())
+  #----------------------------------------------------
+  def add(self,name,wall,cpu=None) :
+    pass
+  #----------------------------------------------------
+  def getWall(self,name) :
+    return(0.0)
+  #----------------------------------------------------
+  def count(self,name,n=1) :
+    pass
+  #----------------------------------------------------
+  def set(self,name,value) :
+    pass
+
+#----------------------------------------------------
+def loadPlan(csvFile,fix=False,jobs=1,cache=None,dump=False,metrics=None) :
+  # Built and percolated tree of csvFile. With a cache file, the tree is
+  # taken from the compiled plan when the files it was built from did not
+  # change since, and saved to it otherwise.
+  trace=Trace("build")
+  flags=("fix",fix)
+  metrics=metrics or NoMetrics()
+  if cache :
+    from . import Cache
+  if cache and not dump :
+    with metrics.phase('build') :
+      packed=Cache.load(cache,csvFile,flags)
+    if packed is not None and len(packed[2]) == len(Tree.columns) :
+      trace.info("compiled plan %s loaded",cache)
+      metrics.set('compiled',True)
+      tree=unpack(packed)
+      metrics.set('nodes',tree.getSize())
+      return(tree)
+    trace.info("compiled plan %s missing or out of date",cache)
+  tree=Tree()
+  with metrics.phase('build') :
+    if jobs > 1 :
+      buildParallel(csvFile,tree,jobs)
+    else :
+      build(csvFile,tree,IncludeCache(metrics or None))
+    resolveDependencies(csvFile,tree)
+  # parsing is what creating and grafting tasks leave of the build
+  metrics.add('parse',metrics.getWall('build') - metrics.getWall('construct') - metrics.getWall('includes'))
+  metrics.set('nodes',tree.getSize())
+  if dump :
+    tree.display(tree.getRoot())
+  with metrics.phase('percolate') :
+    Percolator(SimpleNamespace(fix=fix,dump=dump,metrics=metrics or None),tree)
+  if cache :
+    try :
+      Cache.save(cache,includeOrder(csvFile),flags,tree.pack())
+    except OSError as e :
+      logging.warning("compiled plan not saved : %s",e)
+  return(tree)
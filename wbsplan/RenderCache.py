@@ -0,0 +1,69 @@
+# Rendered fragments of the diagrams, one file per fragment named after the
+# hash of what it was rendered from. Reading a fragment refreshes its date,
+# the least recently used ones are removed when the store grows over its
+# size.
+
+import os
+
+#============================================
+class RenderCache() :
+  #----------------------------------------------------
+  def __init__(self,directory,maxBytes=64 << 20) :
+    self.directory=directory
+    self.maxBytes=maxBytes
+    self.hits=0
+    self.misses=0
+    self.evictions=0
+    os.makedirs(directory,exist_ok=True)
+
+  #----------------------------------------------------
+  def getPath(self,key) :
+    return(os.path.join(self.directory,key))
+
+  #----------------------------------------------------
+  def get(self,key) :
+    path=self.getPath(key)
+    try :
+      with open(path) as f :
+        text=f.read()
+      os.utime(path)
+    except OSError :
+      self.misses += 1
+      return(None)
+    self.hits += 1
+    return(text)
+
+  #----------------------------------------------------
+  def put(self,key,text) :
+    # written aside then renamed : a reader never sees a partial fragment
+    path=self.getPath(key)
+    temporary=path + ".tmp"
+    with open(temporary,"w") as f :
+      f.write(text)
+    os.replace(temporary,path)
+
+  #----------------------------------------------------
+  def trim(self) :
+    # remove the least recently used fragments until the store fits
+    entries=[]
+    total=0
+    with os.scandir(self.directory) as scan :
+      for entry in scan :
+        if entry.is_file() :
+          stat=entry.stat()
+          entries.append((stat.st_mtime_ns,stat.st_size,entry.path))
+          total += stat.st_size
+    entries.sort()
+    for mtime,size,path in entries :
+      if total <= self.maxBytes :
+        break
+      try :
+        os.remove(path)
+      except OSError :
+        continue
+      total -= size
+      self.evictions += 1
+
+  #----------------------------------------------------
+  def toString(self) :
+    return("{:d} hits {:d} misses {:d} evicted".format(self.hits,self.misses,self.evictions))
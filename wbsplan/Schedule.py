@@ -0,0 +1,266 @@
+# Schedule analysis of a percolated tree. A task comes after its parent
+# and after the tasks it depends on (the after column) :
+# - forward pass, parents and dependencies first : earliest start, the
+#   latest of its start, its parent's earliest start and the dates its
+#   dependencies allow, propagated along the chains. A task planned to
+#   start earlier than that is blocked.
+# - backward pass, parents and dependent tasks first : latest end, the
+#   earliest of its parent's latest end and the dates its dependent tasks
+#   need, the root's one being the end of the plan.
+# - slack : latest end - end, in days ; the critical path is the chain of
+#   tasks without slack, those driving the end of the plan
+# - late : started (status between 1 and 99) and still running past its end
+# - backlog late : not started (status 0) past its start
+# A finish to start dependency starts lag days after the day following
+# the end, a start to start one lag days after the start. Each pass is a
+# topological sort of the tasks and of the dependencies, O(V+E), and
+# stops on a dependency cycle.
+# A dependency between a task and one of its ancestors only bounds the
+# task inside : a subtask depending on its ancestor is pushed later going
+# forward, the ancestor's latest end being already bounded by the subtask
+# being inside it ; an ancestor depending on its subtask bounds the
+# subtask's latest end going backward, its own start being already bounded
+# by the subtask's. Each pass thus leaves one of them out, which keeps the
+# parents first.
+# Tasks without an end get no slack, Neutral (status < 0) and Done tasks
+# are never late.
+
+from array import array
+from datetime import date
+from .Plan import PlanError,CRITICAL,LATE,BACKLOG_LATE,BLOCKED,UNSET,NONE,FINISH_TO_START
+from .Trace import Trace
+
+INFINITE=1 << 30
+# dependencies left out by a pass
+ON_ANCESTOR=1
+ON_SUBTASK=2
+
+#============================================
+class Scheduler() :
+  #----------------------------------------------------
+  def __init__(self,tree,today=None) :
+    self.tree=tree
+    self.today=today or date.today().toordinal()
+    self.trace=Trace("schedule")
+    self.earliestStart=None
+    self.latestEnd=None
+    if tree.getSize() :
+      self.link()
+      self.schedule()
+
+  #----------------------------------------------------
+  def link(self) :
+    # Dependencies as edges : edge e says task after[e] depends on task
+    # before[e]. Edges are numbered by task depending and byBefore lists
+    # them by task depended on, the edges of task i being
+    # firstBefore[i]..firstBefore[i+1]-1 in the first order and
+    # firstAfter[i]..firstAfter[i+1]-1 in the second.
+    # Dependencies between a task and its ancestor are marked in skip.
+    t=self.tree
+    n=t.getSize()
+    index=t.getTaskIndex()
+    before=array('i')
+    after=array('i')
+    kind=array('b')
+    lag=array('i')
+    skip=array('b')
+    skipped=[]
+    firstBefore=array('i',[0]) * (n + 1)
+    for i in range(n) :
+      if t.after[i] :
+        for j,k,l in t.getDependencies(i) :
+          if j == i :
+            raise PlanError("dependency cycle {0:s} -> {0:s}".format(t.strings.get(t.id[i])))
+          if index.isUnder(i,j) :
+            skip.append(ON_ANCESTOR)
+            skipped.append(len(before))
+          elif index.isUnder(j,i) :
+            skip.append(ON_SUBTASK)
+            skipped.append(len(before))
+          else :
+            skip.append(0)
+          before.append(j)
+          after.append(i)
+          kind.append(k)
+          lag.append(l)
+      firstBefore[i + 1]=len(before)
+    firstAfter=array('i',[0]) * (n + 1)
+    for j in before :
+      firstAfter[j + 1] += 1
+    for i in range(n) :
+      firstAfter[i + 1] += firstAfter[i]
+    byBefore=array('i',[0]) * len(before)
+    filled=array('i',firstAfter[:n])
+    for e,j in enumerate(before) :
+      byBefore[filled[j]]=e
+      filled[j] += 1
+    self.before=before
+    self.after=after
+    self.kind=kind
+    self.lag=lag
+    self.skip=skip
+    self.skipped=skipped
+    self.firstBefore=firstBefore
+    self.firstAfter=firstAfter
+    self.byBefore=byBefore
+    self.trace.info("%d tasks, %d dependencies",n,len(before))
+
+  #----------------------------------------------------
+  def topologicalOrder(self,forward) :
+    # Kahn : every task after its parent, and after the tasks it depends
+    # on going forward, before them going backward
+    t=self.tree
+    n=t.getSize()
+    parent=t.parent
+    firstChild=t.firstChild
+    nextSibling=t.nextSibling
+    skip=self.skip
+    edges=range(len(self.before))
+    if forward :
+      inFirst,inEdges,outFirst,outEdges,target,left=self.firstBefore,edges,self.firstAfter,self.byBefore,self.after,ON_SUBTASK
+    else :
+      inFirst,inEdges,outFirst,outEdges,target,left=self.firstAfter,self.byBefore,self.firstBefore,edges,self.before,ON_ANCESTOR
+    degree=array('i',[0]) * n
+    for i in range(n) :
+      degree[i]=(parent[i] != NONE) + inFirst[i + 1] - inFirst[i]
+    for e in self.skipped :
+      if skip[e] == left :
+        degree[target[e]] -= 1
+    order=[i for i in range(n) if degree[i] == 0]
+    for i in order :
+      c=firstChild[i]
+      while c != NONE :
+        degree[c] -= 1
+        if degree[c] == 0 :
+          order.append(c)
+        c=nextSibling[c]
+      for e in outEdges[outFirst[i]:outFirst[i + 1]] :
+        if skip[e] != left :
+          j=target[e]
+          degree[j] -= 1
+          if degree[j] == 0 :
+            order.append(j)
+    if len(order) < n :
+      self.raiseCycle(degree,inFirst,inEdges,self.before if forward else self.after,left)
+    return(order)
+
+  #----------------------------------------------------
+  def raiseCycle(self,degree,inFirst,inEdges,source,left) :
+    # a task left by the sort waits for a parent or a task also left : going
+    # from one to the other ends in a loop
+    t=self.tree
+    skip=self.skip
+    i=next(i for i in range(len(degree)) if degree[i])
+    seen={}
+    path=[]
+    while i not in seen :
+      seen[i]=len(path)
+      path.append(i)
+      waited=[source[e] for e in inEdges[inFirst[i]:inFirst[i + 1]] if skip[e] != left] + [t.parent[i]]
+      i=next(j for j in waited if j != NONE and degree[j])
+    cycle=path[seen[i]:] + [i]
+    raise PlanError("dependency cycle {:s}".format(" -> ".join(t.strings.get(t.id[j]) for j in cycle)))
+
+  #----------------------------------------------------
+  def schedule(self) :
+    t=self.tree
+    today=self.today
+    parent=t.parent
+    start=t.start
+    end=t.end
+    status=t.status
+    slack=t.slack
+    tags=t.tags
+    before=self.before
+    after=self.after
+    kind=self.kind
+    lag=self.lag
+    skip=self.skip
+    firstBefore=self.firstBefore
+    firstAfter=self.firstAfter
+    byBefore=self.byBefore
+    n=t.getSize()
+    # forward : earliest start and end, the planned duration kept
+    earliestStart=array('i',[0]) * n
+    earliestEnd=array('i',[0]) * n
+    for i in self.topologicalOrder(True) :
+      es=start[i]
+      p=parent[i]
+      if p != NONE and earliestStart[p] > es :
+        es=earliestStart[p]
+      for e in range(firstBefore[i],firstBefore[i + 1]) :
+        if skip[e] == ON_SUBTASK :
+          continue
+        j=before[e]
+        if kind[e] == FINISH_TO_START :
+          d=earliestEnd[j] + 1 + lag[e] if earliestEnd[j] else 0
+        else :
+          d=earliestStart[j] + lag[e] if earliestStart[j] else 0
+        if d > es :
+          es=d
+      earliestStart[i]=es
+      if end[i] :
+        earliestEnd[i]=end[i] + es - start[i] if start[i] else max(end[i],es)
+    # backward : latest end, a task ending by the time its dependent tasks
+    # must start
+    latestEnd=array('i',[INFINITE]) * n
+    for i in self.topologicalOrder(False) :
+      p=parent[i]
+      le=(max(end[i],earliestEnd[i]) or INFINITE) if p == NONE else latestEnd[p]
+      duration=end[i] - start[i] if start[i] and end[i] else 0
+      for e in byBefore[firstAfter[i]:firstAfter[i + 1]] :
+        j=after[e]
+        if skip[e] == ON_ANCESTOR or latestEnd[j] == INFINITE :
+          continue
+        latestStart=latestEnd[j] - (end[j] - start[j] if start[j] and end[j] else 0)
+        if kind[e] == FINISH_TO_START :
+          d=latestStart - 1 - lag[e]
+        else :
+          d=latestStart - lag[e] + duration
+        if d < le :
+          le=d
+      latestEnd[i]=le
+    for i in range(n) :
+      e=end[i]
+      s=status[i]
+      tag=0
+      if e and latestEnd[i] != INFINITE :
+        slack[i]=latestEnd[i] - e
+        if slack[i] <= 0 :
+          tag=CRITICAL
+      else :
+        slack[i]=UNSET
+      if s == 0 :
+        if start[i] and start[i] < today :
+          tag |= BACKLOG_LATE
+      elif 0 < s < 100 :
+        if e and e < today :
+          tag |= LATE
+      if 0 <= s < 100 and start[i] and earliestStart[i] > start[i] :
+        tag |= BLOCKED
+      tags[i]=tag
+    self.earliestStart=earliestStart
+    self.latestEnd=latestEnd
+    self.trace.info("%d tasks scheduled, %d critical, %d late, %d backlog late, %d blocked",
+      n,
+      lambda : sum(1 for tag in tags if tag & CRITICAL),
+      lambda : sum(1 for tag in tags if tag & LATE),
+      lambda : sum(1 for tag in tags if tag & BACKLOG_LATE),
+      lambda : sum(1 for tag in tags if tag & BLOCKED),
+    )
+
+  #----------------------------------------------------
+  def getEarliestStart(self,i) :
+    # start the parents and dependencies allow, 0 if unknown
+    return(self.earliestStart[i])
+
+  #----------------------------------------------------
+  def getLatestEnd(self,i) :
+    # end the dependent tasks and the end of the plan allow, 0 if unknown
+    le=self.latestEnd[i]
+    return(0 if le == INFINITE else le)
+
+  #----------------------------------------------------
+  def getCriticalPath(self) :
+    # tasks without slack, in document order
+    return([i for i,tag in enumerate(self.tree.tags) if tag & CRITICAL])
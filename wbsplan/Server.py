@@ -0,0 +1,216 @@
+# Render server : plans stay built and percolated in memory. Their files
+# are polled, a changed plan is rebuilt aside in a worker thread, with the
+# included files that did not change taken from its IncludeCache, and only
+# then swapped in : a request renders the tree it started with and never
+# waits for a reload. HTTP/1.0 over TCP or a Unix socket :
+#   GET /plans                          plans, sizes and load errors (JSON)
+#   GET /plans/<name>/wbs[?root=<id>]   WBS of the plan or of a subtree
+#   GET /plans/<name>/gantt[?root=<id>] Gantt of the plan or of a subtree
+
+import os
+import json
+import time
+import asyncio
+import logging
+import urllib.parse
+from types import SimpleNamespace
+from .Plan import Tree,PlanError,IncludeCache,Percolator,build,includeOrder,resolveDependencies
+from .Generators import FORMATS,generate
+from .Sinks import MemorySink
+
+REASONS={
+  200 : "OK",
+  400 : "Bad Request",
+  404 : "Not Found",
+  405 : "Method Not Allowed",
+  500 : "Internal Server Error",
+  503 : "Service Unavailable",
+}
+
+#============================================
+class ResidentPlan() :
+  # A plan file, its current tree and the state of the files it was
+  # built from
+  #----------------------------------------------------
+  def __init__(self,name,csvFile,fix) :
+    self.name=name
+    self.csvFile=csvFile
+    self.fix=fix
+    self.includes=IncludeCache()
+    self.tree=None
+    self.files=[csvFile]
+    self.signature=None
+    self.loaded=None
+    self.error=None
+    self.reloading=False
+
+  #----------------------------------------------------
+  def getSignature(self,files=None) :
+    # what tells a file changed, None for a missing one
+    signature=[]
+    for path in files or self.files :
+      try :
+        stat=os.stat(path)
+        signature.append((path,stat.st_mtime_ns,stat.st_size))
+      except OSError :
+        signature.append((path,None,None))
+    return(tuple(signature))
+
+  #----------------------------------------------------
+  def isChanged(self) :
+    return(self.getSignature() != self.signature)
+
+  #----------------------------------------------------
+  def load(self) :
+    # Worker thread side : builds a new tree, the current one is not
+    # touched. The files are looked at before being read, a change during
+    # the build is seen by the next poll.
+    files=includeOrder(self.csvFile)
+    signature=self.getSignature(files)
+    tree=Tree()
+    build(self.csvFile,tree,self.includes)
+    resolveDependencies(self.csvFile,tree)
+    self.includes.sweep()
+    Percolator(SimpleNamespace(fix=self.fix,dump=False),tree)
+    # built here rather than by the first request, on the event loop
+    tree.getTaskIndex()
+    return(tree,files,signature)
+
+  #----------------------------------------------------
+  def swap(self,tree,files,signature) :
+    # Event loop side
+    self.tree=tree
+    self.files=files
+    self.signature=signature
+    self.loaded=time.time()
+    self.error=None
+
+  #----------------------------------------------------
+  def fail(self,error) :
+    # the previous tree is still served, the files are tried again once
+    # they change
+    self.signature=self.getSignature()
+    self.error=str(error)
+
+  #----------------------------------------------------
+  def toJson(self) :
+    return({
+      'name' : self.name,
+      'file' : self.csvFile,
+      'tasks' : self.tree.getSize() if self.tree else 0,
+      'files' : len(self.files),
+      'loaded' : time.strftime("%Y-%m-%dT%H:%M:%S",time.localtime(self.loaded)) if self.loaded else None,
+      'error' : self.error,
+    })
+
+#============================================
+class RenderServer() :
+  #----------------------------------------------------
+  def __init__(self,plans,interval=1.0) :
+    self.plans=plans
+    self.interval=interval
+    self.reloads=0
+
+  #----------------------------------------------------
+  def loadAll(self) :
+    # first load, before serving : errors stop the server
+    for plan in self.plans.values() :
+      plan.swap(*plan.load())
+
+  #----------------------------------------------------
+  async def watch(self) :
+    loop=asyncio.get_running_loop()
+    while True :
+      await asyncio.sleep(self.interval)
+      for plan in self.plans.values() :
+        if not plan.reloading and plan.isChanged() :
+          plan.reloading=True
+          loop.create_task(self.reload(plan))
+
+  #----------------------------------------------------
+  async def reload(self,plan) :
+    loop=asyncio.get_running_loop()
+    try :
+      plan.swap(*await loop.run_in_executor(None,plan.load))
+      self.reloads += 1
+      logging.info("plan %s reloaded, %d tasks",plan.name,plan.tree.getSize())
+    except (PlanError,OSError,ValueError) as e :
+      plan.fail(e)
+      logging.warning("plan %s not reloaded : %s",plan.name,e)
+    finally :
+      plan.reloading=False
+
+  #----------------------------------------------------
+  async def handle(self,reader,writer) :
+    method=None
+    try :
+      try :
+        method,target,version=(await reader.readline()).decode("latin-1").split()
+        while (await reader.readline()) not in (b"\r\n",b"\n",b"") :
+          pass
+        status,contentType,body=await self.respond(method,target)
+      except (ValueError,UnicodeDecodeError) :
+        status,contentType,body=400,"text/plain","bad request\n"
+      data=body.encode()
+      writer.write("HTTP/1.0 {:d} {:s}\r\nContent-Type: {:s}; charset=utf-8\r\nContent-Length: {:d}\r\nConnection: close\r\n\r\n".format(
+        status,
+        REASONS[status],
+        contentType,
+        len(data),
+      ).encode("latin-1"))
+      if method != "HEAD" :
+        writer.write(data)
+      await writer.drain()
+    except ConnectionError :
+      pass
+    finally :
+      writer.close()
+
+  #----------------------------------------------------
+  async def respond(self,method,target) :
+    if method not in ("GET","HEAD") :
+      return(405,"text/plain","GET only\n")
+    url=urllib.parse.urlsplit(target)
+    parts=[urllib.parse.unquote(p) for p in url.path.split("/") if p]
+    if parts == ["plans"] :
+      return(200,"application/json",json.dumps([p.toJson() for p in self.plans.values()],indent=1) + "\n")
+    if len(parts) != 3 or parts[0] != "plans" or parts[1] not in self.plans or parts[2] not in FORMATS :
+      return(404,"text/plain","unknown resource {:s}\n".format(url.path))
+    plan=self.plans[parts[1]]
+    tree=plan.tree
+    if tree is None or tree.getSize() == 0 :
+      return(503,"text/plain","plan {:s} not loaded\n".format(plan.name))
+    root=0
+    query=urllib.parse.parse_qs(url.query)
+    if "root" in query :
+      root=tree.getTaskIndex().find(query["root"][0])
+      if root is None :
+        return(404,"text/plain","unknown task {:s}\n".format(query["root"][0]))
+    loop=asyncio.get_running_loop()
+    try :
+      body=await loop.run_in_executor(None,render,tree,parts[2],root)
+    except PlanError as e :
+      return(500,"text/plain","{:s}\n".format(str(e)))
+    return(200,"text/plain",body)
+
+  #----------------------------------------------------
+  async def serve(self,host=None,port=None,socket=None) :
+    if socket :
+      server=await asyncio.start_unix_server(self.handle,path=socket)
+    else :
+      server=await asyncio.start_server(self.handle,host,port)
+    for s in server.sockets :
+      logging.warning("serving on %s",s.getsockname())
+    watcher=asyncio.get_running_loop().create_task(self.watch())
+    try :
+      async with server :
+        await server.serve_forever()
+    finally :
+      watcher.cancel()
+
+#----------------------------------------------------
+def render(tree,format,root) :
+  # worker thread side
+  sink=MemorySink()
+  generate(tree,[(format,sink)],None,None,1,root)
+  return(sink.getValue())
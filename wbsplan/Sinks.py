@@ -0,0 +1,135 @@
+# Destinations of the generated diagrams. Generators yield text chunks, a
+# sink gathers them and writes them by blocks of about BUFFER characters :
+# few writes whatever the number of lines, and memory bounded by the block.
+# A sink counts the bytes it wrote, encoded, or compressed for gzip files.
+
+import io
+import sys
+import gzip
+import tempfile
+
+BUFFER=1 << 16
+
+#============================================
+class Sink() :
+  # Buffered writer over a text stream, subclasses open the stream
+  #----------------------------------------------------
+  def __init__(self,stream,size=BUFFER) :
+    self.stream=stream
+    self.size=size
+    self.chunks=[]
+    self.pending=0
+    self.written=0
+    self.encoding=getattr(stream,"encoding",None) or "utf-8"
+
+  #----------------------------------------------------
+  def write(self,chunk) :
+    self.chunks.append(chunk)
+    self.pending += len(chunk)
+    if self.pending >= self.size :
+      self.flush()
+
+  #----------------------------------------------------
+  def writeAll(self,chunks) :
+    for chunk in chunks :
+      self.write(chunk)
+
+  #----------------------------------------------------
+  def flush(self) :
+    if self.chunks :
+      text="".join(self.chunks)
+      self.stream.write(text)
+      self.written += len(text) if text.isascii() else len(text.encode(self.encoding))
+      self.chunks=[]
+      self.pending=0
+    self.stream.flush()
+
+  #----------------------------------------------------
+  def getWritten(self) :
+    # bytes written so far, the pending text first
+    if self.chunks :
+      self.flush()
+    return(self.written)
+
+  #----------------------------------------------------
+  def close(self) :
+    self.flush()
+    self.stream.close()
+
+  #----------------------------------------------------
+  def __enter__(self) :
+    return(self)
+
+  #----------------------------------------------------
+  def __exit__(self,*exc) :
+    self.close()
+
+#============================================
+class StdoutSink(Sink) :
+  #----------------------------------------------------
+  def __init__(self,size=BUFFER) :
+    Sink.__init__(self,sys.stdout,size)
+
+  #----------------------------------------------------
+  def close(self) :
+    # stdout belongs to the process
+    self.flush()
+
+#============================================
+class FileSink(Sink) :
+  #----------------------------------------------------
+  def __init__(self,fileName,size=BUFFER) :
+    Sink.__init__(self,open(fileName,"w"),size)
+
+#============================================
+class GzipSink(Sink) :
+  #----------------------------------------------------
+  def __init__(self,fileName,size=BUFFER) :
+    Sink.__init__(self,gzip.open(fileName,"wt"),size)
+
+  #----------------------------------------------------
+  def flush(self) :
+    # the compressed bytes are counted
+    Sink.flush(self)
+    self.written=self.stream.buffer.fileobj.tell()
+
+#============================================
+class MemorySink(Sink) :
+  #----------------------------------------------------
+  def __init__(self,size=BUFFER) :
+    Sink.__init__(self,io.StringIO(),size)
+
+  #----------------------------------------------------
+  def getValue(self) :
+    self.flush()
+    return(self.stream.getvalue())
+
+  #----------------------------------------------------
+  def close(self) :
+    # the text stays readable
+    self.flush()
+
+#============================================
+class SpoolSink(Sink) :
+  # Holds on disk an output which must follow another one in the same
+  # destination, while both are generated in the same walk
+  #----------------------------------------------------
+  def __init__(self,size=BUFFER) :
+    Sink.__init__(self,tempfile.TemporaryFile("w+"),size)
+
+  #----------------------------------------------------
+  def copyTo(self,sink) :
+    self.flush()
+    self.stream.seek(0)
+    for block in iter(lambda : self.stream.read(self.size),"") :
+      sink.write(block)
+    sink.flush()
+
+#----------------------------------------------------
+def openSink(fileName) :
+  # '-' or None for stdout, gzip for names ending in .gz
+  if fileName is None or fileName == "-" :
+    return(StdoutSink())
+  if fileName.endswith(".gz") :
+    return(GzipSink(fileName))
+  return(FileSink(fileName))
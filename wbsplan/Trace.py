@@ -0,0 +1,50 @@
+import logging
+
+PHASES=('build','percolate','fix','schedule','load','render')
+LEVELS={
+  'info' : logging.INFO,
+  'debug' : logging.DEBUG,
+}
+
+#============================================
+class Trace() :
+  # Diagnostics of one phase, silent unless the phase is traced.
+  # Arguments may be callables (node.toStringAll for instance) : they are
+  # only called when the message is really emitted.
+  __slots__=('logger',)
+  #----------------------------------------------------
+  def __init__(self,phase) :
+    self.logger=logging.getLogger("trace." + phase)
+
+  #----------------------------------------------------
+  def isOn(self,level=logging.DEBUG) :
+    return(self.logger.isEnabledFor(level))
+
+  #----------------------------------------------------
+  def info(self,message,*args) :
+    if self.logger.isEnabledFor(logging.INFO) :
+      self.logger.info(message,*evaluate(args),stacklevel=2)
+
+  #----------------------------------------------------
+  def debug(self,message,*args) :
+    if self.logger.isEnabledFor(logging.DEBUG) :
+      self.logger.debug(message,*evaluate(args),stacklevel=2)
+
+#----------------------------------------------------
+def evaluate(args) :
+  return([a() if callable(a) else a for a in args])
+
+#----------------------------------------------------
+def setTrace(spec) :
+  # spec is a comma separated list of phase[:level], 'all' for every phase,
+  # the level is debug (everything) unless given
+  for item in spec.split(",") :
+    phase,sep,level=item.strip().partition(":")
+    level=level or 'debug'
+    if level not in LEVELS :
+      raise ValueError("unknown trace level <{:s}>".format(level))
+    phases=PHASES if phase == 'all' else [phase]
+    for p in phases :
+      if p not in PHASES :
+        raise ValueError("unknown trace phase <{:s}>".format(p))
+      logging.getLogger("trace." + p).setLevel(LEVELS[level])
@@ -0,0 +1,84 @@
+# Iterative walks over the columns of a tree (parent, firstChild,
+# nextSibling). No recursion and no stack : the position in the tree is the
+# only state, so any depth can be walked and each link is followed once.
+
+from array import array
+
+NONE=-1
+DOWN=0
+UP=1
+
+#----------------------------------------------------
+def preOrder(tree,root) :
+  # root, then each child subtree in order
+  firstChild=tree.firstChild
+  nextSibling=tree.nextSibling
+  parent=tree.parent
+  i=root
+  while True :
+    yield i
+    c=firstChild[i]
+    if c != NONE :
+      i=c
+      continue
+    while i != root and nextSibling[i] == NONE :
+      i=parent[i]
+    if i == root :
+      return
+    i=nextSibling[i]
+
+#----------------------------------------------------
+def postOrder(tree,root) :
+  # each child subtree in order, then root
+  firstChild=tree.firstChild
+  nextSibling=tree.nextSibling
+  parent=tree.parent
+  i=root
+  while firstChild[i] != NONE :
+    i=firstChild[i]
+  while True :
+    yield i
+    if i == root :
+      return
+    s=nextSibling[i]
+    if s != NONE :
+      i=s
+      while firstChild[i] != NONE :
+        i=firstChild[i]
+    else :
+      i=parent[i]
+
+#----------------------------------------------------
+def walk(tree,root) :
+  # (DOWN,i) when entering i, (UP,i) when leaving it once its subtree is
+  # done : a parent sees DOWN/UP of each child in order, between its own
+  firstChild=tree.firstChild
+  nextSibling=tree.nextSibling
+  parent=tree.parent
+  i=root
+  while True :
+    yield (DOWN,i)
+    c=firstChild[i]
+    if c != NONE :
+      i=c
+      continue
+    while True :
+      yield (UP,i)
+      if i == root :
+        return
+      s=nextSibling[i]
+      if s != NONE :
+        i=s
+        break
+      i=parent[i]
+
+#----------------------------------------------------
+def subtreeSizes(tree) :
+  # number of tasks of each subtree, the task included. Tasks are stored
+  # in pre-order : the subtree of i is i .. i+size-1.
+  parent=tree.parent
+  size=array('i',[1]) * len(parent)
+  for i in range(len(parent) - 1,0,-1) :
+    if parent[i] != NONE :
+      size[parent[i]] += size[i]
+  return(size)
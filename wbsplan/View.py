@@ -0,0 +1,104 @@
+# Views of a tree : the part of a subtree a diagram shows.
+# - max depth : levels shown under the root, a task at the last one
+#   stands for its whole subtree
+# - done collapse : a Done task stands for its whole subtree
+# - owner and status filters : only the tasks matching all of them and
+#   the tasks leading to them are shown, the others are left out
+# A task standing for its subtree is rolled up : it is drawn with the
+# start and end percolated from its subtree (the down values) and with its
+# percolated status, as in the whole diagram.
+# The view is pruned as it is walked : a cut branch is never entered and a
+# left out one costs a lookup in the pre-ordered list of the matching
+# tasks, so the walk is proportional to the tasks shown and their children.
+
+import bisect
+from .Traversal import NONE
+
+#============================================
+class View() :
+  #----------------------------------------------------
+  def __init__(self,tree,maxDepth=None,owner=None,status=None,collapseDone=False) :
+    self.tree=tree
+    self.maxDepth=maxDepth
+    self.collapseDone=collapseDone
+    self.index=tree.getTaskIndex()
+    # tasks matching every filter, in pre-order, None without filters
+    self.matching=None
+    lists=[]
+    if owner is not None :
+      lists.append(self.index.getOwned(owner))
+    if status is not None :
+      lists.append(self.index.getStatus(status))
+    if lists :
+      lists.sort(key=len)
+      self.matching=[i for i in lists[0] if all(contains(other,i) for other in lists[1:])]
+
+  #----------------------------------------------------
+  def isShown(self,i) :
+    # whether the filters keep i : its subtree holds a matching task
+    if self.matching is None :
+      return(True)
+    k=bisect.bisect_left(self.matching,i)
+    return(k < len(self.matching) and self.matching[k] < i + self.index.size[i])
+
+  #----------------------------------------------------
+  def isRolledUp(self,i,root) :
+    # whether i stands for its subtree
+    t=self.tree
+    if t.firstChild[i] == NONE :
+      return(False)
+    if self.maxDepth is not None and t.level[i] - t.level[root] >= self.maxDepth :
+      return(True)
+    return(self.collapseDone and t.status[i] >= 100)
+
+  #----------------------------------------------------
+  def walk(self,root) :
+    # (i,rolled up) of the tasks shown, in pre-order. The root is always
+    # shown.
+    t=self.tree
+    firstChild=t.firstChild
+    nextSibling=t.nextSibling
+    parent=t.parent
+    isShown=self.isShown
+    i=root
+    while True :
+      rolledUp=self.isRolledUp(i,root)
+      yield (i,rolledUp)
+      c=NONE if rolledUp else firstChild[i]
+      while c != NONE and not isShown(c) :
+        c=nextSibling[c]
+      if c != NONE :
+        i=c
+        continue
+      # the next sibling shown, of i or of one of its ancestors
+      while True :
+        if i == root :
+          return
+        s=nextSibling[i]
+        while s != NONE and not isShown(s) :
+          s=nextSibling[s]
+        if s != NONE :
+          i=s
+          break
+        i=parent[i]
+
+  #----------------------------------------------------
+  def contains(self,i,root) :
+    # whether task i is drawn in the view of root : in its subtree, kept by
+    # the filters and not inside a rolled up task, the root being always
+    # drawn
+    if not self.index.isUnder(i,root) or (i != root and not self.isShown(i)) :
+      return(False)
+    parent=self.tree.parent
+    j=i
+    while j != root :
+      j=parent[j]
+      if self.isRolledUp(j,root) :
+        return(False)
+    return(True)
+
+#----------------------------------------------------
+def contains(tasks,i) :
+  # tasks is in pre-order
+  k=bisect.bisect_left(tasks,i)
+  return(k < len(tasks) and tasks[k] == i)
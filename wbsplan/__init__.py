@@ -0,0 +1,89 @@
+# Work breakdown structure plans : CSV files of tasks, percolated and
+# rendered as PlantUML diagrams.
+#
+#   tree=wbsplan.load_plan("plan.csv")
+#   percolator=wbsplan.percolate(tree,fix=True)
+#   wbsplan.schedule(tree)
+#   text=wbsplan.render(tree,["wbs","gantt"])
+#
+# Importing the package loads nothing else : the modules behind the API and
+# the names below are imported on first use.
+
+import importlib
+
+# public name : module defining it
+LAZY={
+  'PlanError' : 'Plan',
+  'Tree' : 'Plan',
+  'Node' : 'Plan',
+  'Percolator' : 'Plan',
+  'loadPlan' : 'Plan',
+  'Scheduler' : 'Schedule',
+  'LoadTable' : 'Load',
+  'View' : 'View',
+  'Generation' : 'Generators',
+  'WbsGenerator' : 'Generators',
+  'GanttGenerator' : 'Generators',
+  'FORMATS' : 'Generators',
+  'Sink' : 'Sinks',
+  'MemorySink' : 'Sinks',
+  'openSink' : 'Sinks',
+}
+
+#----------------------------------------------------
+def __getattr__(name) :
+  if name in LAZY :
+    return(getattr(importlib.import_module("." + LAZY[name],__name__),name))
+  raise AttributeError("module {!r} has no attribute {!r}".format(__name__,name))
+
+#----------------------------------------------------
+def load_plan(path,jobs=1) :
+  # Tree of the plan file path and of the files it includes, parsed by
+  # jobs processes. Errors raise PlanError.
+  from .Plan import Tree,build,buildParallel,resolveDependencies
+  tree=Tree()
+  if jobs > 1 :
+    buildParallel(path,tree,jobs)
+  else :
+    build(path,tree)
+  resolveDependencies(path,tree)
+  return(tree)
+
+#----------------------------------------------------
+def percolate(tree,fix=False) :
+  # Roll the dates and statuses up and down the tree. The Percolator
+  # returned applies later changes incrementally with update().
+  from types import SimpleNamespace
+  from .Plan import Percolator
+  return(Percolator(SimpleNamespace(fix=fix,dump=False),tree))
+
+#----------------------------------------------------
+def schedule(tree,today=None) :
+  # Tag the critical, late and backlog late tasks of a percolated tree,
+  # today being a date ordinal, date.today() by default
+  from .Schedule import Scheduler
+  return(Scheduler(tree,today))
+
+#----------------------------------------------------
+def resource_load(tree,week=False) :
+  # Load of each owner by day or week : getLoad(who), getOverloads()
+  from .Load import LoadTable
+  return(LoadTable(tree,week))
+
+#----------------------------------------------------
+def render(tree,formats="wbs",output=None,jobs=1,cache=None,root=0,view=None) :
+  # Diagrams of a percolated tree, each format after the previous one.
+  # output is a file name or a Sink, the text is returned when it is None.
+  # cache is a RenderCache or the directory of one. root is the index of
+  # the task drawn from, view a View pruning the diagrams.
+  from .Generators import generate
+  from .Sinks import MemorySink
+  from .RenderCache import RenderCache
+  if isinstance(formats,str) :
+    formats=[formats]
+  if isinstance(cache,str) :
+    cache=RenderCache(cache)
+  sink=MemorySink() if output is None else output
+  generate(tree,[(format,sink) for format in formats],None,cache,jobs,root,view=view)
+  if output is None :
+    return(sink.getValue())
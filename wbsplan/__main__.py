@@ -0,0 +1,6 @@
+# python -m wbsplan scan ...
+from .Cli import main
+
+#----------------------------------------------------
+if __name__ == '__main__' :
+  main()